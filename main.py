@@ -6,22 +6,90 @@ Based on Aider + OpenAI Function Calling
 This version includes REAL tool support using OpenAI's function calling API.
 """
 
+import asyncio
+import atexit
+import importlib.util
 import os
+import random
 import sys
+import time
+import traceback
 import re
 import subprocess
+import threading
 import json
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from fnmatch import fnmatchcase
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple, Any, Callable
 from dataclasses import dataclass
 from enum import Enum
-import openai
+
+try:  # Optional async prompt; falls back to input()
+    from prompt_toolkit import PromptSession
+    from prompt_toolkit.patch_stdout import patch_stdout
+except ImportError:
+    PromptSession = None
+
+try:  # Optional C JSON codec for tool arguments/results
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def json_loads(payload: str) -> Any:
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+
+def json_dumps(data: Any) -> str:
+    if orjson is not None:
+        try:
+            return orjson.dumps(data).decode("utf-8")
+        except TypeError:
+            pass  # e.g. non-str dict keys; stdlib handles them
+    return json.dumps(data)
 
 # ============================================================================
 # CONFIGURATION
 # ============================================================================
 
 
+# System prompts, shared by every agent in the process
+SYSTEM_PROMPT_TOOLS = """You are an expert coding assistant with access to tools.
+
+You can:
+1. Read files with read_file(filepath)
+2. Write files with write_file(filepath, content)
+3. List files with list_files(pattern)
+4. Apply edits with apply_edit(filepath, search, replace)
+5. Run commands with run_command(command)
+6. Check git status with git_status()
+7. View git diff with git_diff()
+
+When making edits:
+- Use apply_edit() for targeted changes
+- Use write_file() for new files or complete rewrites
+- Always read_file() first to see current contents
+
+Be concise and helpful."""
+
+SYSTEM_PROMPT_EDITS = """You are an expert coding assistant. You can edit files using search/replace blocks:
+
+filename.py
+```python
+<<<<<<< SEARCH
+old code
+=======
+new code
+>>>>>>> REPLACE
+```
+
+Be concise and helpful."""
+
+
 @dataclass
 class AgentConfig:
     """Configuration for the agent"""
@@ -34,12 +102,55 @@ class AgentConfig:
     max_retries: int = 3
     stream: bool = True
     use_tools: bool = True  # Enable function calling
+    debug: bool = False  # Pretty-print tool arguments
+    max_concurrency: int = 8  # In-flight completion requests per agent
+    max_tool_workers: int = 4  # Tool calls running at once within a turn
+    max_edit_workers: int = 8  # Files edited at once when applying text edits
 
 
 # ============================================================================
 # TOOL DEFINITIONS
 # ============================================================================
 
+# OpenAI Batch API: half-price, higher limits, results within the window
+BATCH_ENDPOINT = "/v1/chat/completions"
+BATCH_COMPLETION_WINDOW = "24h"
+BATCH_POLL_INTERVAL = 10.0
+BATCH_TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+# Streamed text is flushed in batches rather than per token
+STREAM_FLUSH_CHARS = 64
+STREAM_FLUSH_INTERVAL = 0.05
+
+# Directories list_files never descends into
+PRUNED_DIRS = {".git", "node_modules", ".venv", "venv", "__pycache__"}
+
+# Read-only tools that may run concurrently within one assistant turn
+CONCURRENT_SAFE_TOOLS = {"read_file", "list_files", "git_diff", "git_status"}
+
+
+def _match_parts(parts: List[str], pattern_parts: List[str]) -> bool:
+    """Match path segments against pattern segments; ``**`` spans any depth"""
+    if not pattern_parts:
+        return not parts
+    head = pattern_parts[0]
+    if head == "**":
+        return any(
+            _match_parts(parts[i:], pattern_parts[1:]) for i in range(len(parts) + 1)
+        )
+    return (
+        bool(parts)
+        and fnmatchcase(parts[0], head)
+        and _match_parts(parts[1:], pattern_parts[1:])
+    )
+
+
+def _glob_match(rel_path: str, pattern: str) -> bool:
+    """Path.rglob semantics: the pattern may match at any depth below the root"""
+    parts = rel_path.split("/")
+    pattern_parts = pattern.split("/")
+    return any(_match_parts(parts[i:], pattern_parts) for i in range(len(parts)))
+
 
 class ToolRegistry:
     """Registry of available tools for the agent"""
@@ -47,6 +158,7 @@ class ToolRegistry:
     def __init__(self):
         self.tools: Dict[str, Dict[str, Any]] = {}
         self.implementations: Dict[str, Callable] = {}
+        self._schema_cache: Optional[List[Dict[str, Any]]] = None
 
     def register_tool(
         self,
@@ -68,18 +180,22 @@ class ToolRegistry:
         }
 
         self.implementations[name] = implementation
+        self._schema_cache = None
 
     def get_tool_schemas(self) -> List[Dict[str, Any]]:
-        """Get all tool schemas for OpenAI API"""
-        return list(self.tools.values())
+        """Get all tool schemas for OpenAI API (built once per registration)"""
+        if self._schema_cache is None:
+            self._schema_cache = list(self.tools.values())
+        return self._schema_cache
 
     def execute_tool(self, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
         """Execute a tool by name"""
-        if name not in self.implementations:
+        implementation = self.implementations.get(name)
+        if implementation is None:
             return {"error": f"Tool {name} not found"}
 
         try:
-            result = self.implementations[name](**arguments)
+            result = implementation(**arguments)
             return {"success": True, "result": result}
         except Exception as e:
             return {"success": False, "error": str(e)}
@@ -96,14 +212,25 @@ class MessageHistory:
     def __init__(self):
         self.messages: List[Dict[str, Any]] = []
         self.system_prompt: Optional[str] = None
+        # Live API view (system prompt + messages), appended to incrementally
+        self._api_messages: List[Dict[str, Any]] = []
 
     def set_system_prompt(self, prompt: str):
         """Set the system prompt"""
         self.system_prompt = prompt
+        self._rebuild_api_messages()
+
+    def _rebuild_api_messages(self):
+        system = [{"role": "system", "content": self.system_prompt}]
+        self._api_messages = (system if self.system_prompt else []) + self.messages
+
+    def _append(self, message: Dict[str, Any]):
+        self.messages.append(message)
+        self._api_messages.append(message)
 
     def add_user_message(self, content: str):
         """Add user message to history"""
-        self.messages.append({"role": "user", "content": content})
+        self._append({"role": "user", "content": content})
 
     def add_assistant_message(
         self, content: Optional[str] = None, tool_calls: Optional[List[Dict]] = None
@@ -117,11 +244,11 @@ class MessageHistory:
         if tool_calls:
             message["tool_calls"] = tool_calls
 
-        self.messages.append(message)
+        self._append(message)
 
     def add_tool_result(self, tool_call_id: str, name: str, result: str):
         """Add tool execution result"""
-        self.messages.append(
+        self._append(
             {
                 "role": "tool",
                 "tool_call_id": tool_call_id,
@@ -130,15 +257,23 @@ class MessageHistory:
             }
         )
 
+    def extend_tool_results(self, items: List[Tuple[str, str, str]]):
+        """Add one turn's (tool_call_id, name, result) results in one step"""
+        batch = [
+            {"role": "tool", "tool_call_id": tool_call_id, "name": name, "content": result}
+            for tool_call_id, name, result in items
+        ]
+        self.messages.extend(batch)
+        self._api_messages.extend(batch)
+
     def get_messages_for_api(self) -> List[Dict[str, Any]]:
-        """Get messages formatted for OpenAI API"""
-        if self.system_prompt:
-            return [{"role": "system", "content": self.system_prompt}] + self.messages
-        return self.messages
+        """Get messages formatted for OpenAI API (live list, grows in place)"""
+        return self._api_messages
 
     def clear(self):
         """Clear all messages (keeps system prompt)"""
         self.messages = []
+        self._rebuild_api_messages()
 
 
 # ============================================================================
@@ -215,6 +350,39 @@ class GitRepo:
 # ============================================================================
 
 
+# Context file contents by path, tagged with the (mtime_ns, size) they were read at
+CONTEXT_CACHE_SIZE = 64
+_context_cache: "OrderedDict[str, Tuple[Tuple[int, int], str]]" = OrderedDict()
+_context_cache_lock = threading.Lock()
+
+
+def _read_by_key(path: str, mtime_ns: int, size: int) -> str:
+    """File contents keyed by stat signature; a changed file misses the cache"""
+    key = (mtime_ns, size)
+    with _context_cache_lock:
+        cached = _context_cache.get(path)
+        if cached is not None and cached[0] == key:
+            _context_cache.move_to_end(path)
+            return cached[1]
+    content = Path(path).read_text()
+    _remember_file(path, key, content)
+    return content
+
+
+def _remember_file(path: str, key: Tuple[int, int], content: str):
+    with _context_cache_lock:
+        _context_cache[path] = (key, content)
+        _context_cache.move_to_end(path)
+        if len(_context_cache) > CONTEXT_CACHE_SIZE:
+            _context_cache.popitem(last=False)
+
+
+def clear_context_file_cache():
+    """Drop all cached context file contents"""
+    with _context_cache_lock:
+        _context_cache.clear()
+
+
 class FileManager:
     """Manages file operations"""
 
@@ -225,7 +393,8 @@ class FileManager:
         """Read file contents"""
         full_path = self.root_path / filepath
         try:
-            return full_path.read_text()
+            st = full_path.stat()
+            return _read_by_key(str(full_path), st.st_mtime_ns, st.st_size)
         except Exception as e:
             raise Exception(f"Error reading {filepath}: {str(e)}")
 
@@ -235,16 +404,42 @@ class FileManager:
         try:
             full_path.parent.mkdir(parents=True, exist_ok=True)
             full_path.write_text(content)
+            # A same-size rewrite within one mtime tick keeps the old stat key,
+            # so the cache must hold what was just written, not what was read.
+            st = full_path.stat()
+            _remember_file(str(full_path), (st.st_mtime_ns, st.st_size), content)
         except Exception as e:
+            with _context_cache_lock:
+                _context_cache.pop(str(full_path), None)
             raise Exception(f"Error writing {filepath}: {str(e)}")
 
     def list_files(self, pattern: str = "*") -> List[str]:
-        """List files matching pattern"""
+        """List files matching pattern (scandir walk, pruning PRUNED_DIRS)"""
+        nested = "/" in pattern
         files = []
-        for path in self.root_path.rglob(pattern):
-            if path.is_file():
-                files.append(str(path.relative_to(self.root_path)))
-        return files
+        stack = [str(self.root_path)]
+        while stack:
+            directory = stack.pop()
+            try:
+                entries = os.scandir(directory)
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    # DirEntry caches the type from readdir: no stat per entry
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in PRUNED_DIRS:
+                            stack.append(entry.path)
+                    elif entry.is_file():
+                        rel_path = os.path.relpath(entry.path, self.root_path)
+                        if nested:
+                            if os.sep != "/":
+                                rel_path = rel_path.replace(os.sep, "/")
+                            if _glob_match(rel_path, pattern):
+                                files.append(rel_path)
+                        elif fnmatchcase(entry.name, pattern):
+                            files.append(rel_path)
+        return sorted(files)
 
     def apply_edit(self, filepath: str, search: str, replace: str) -> bool:
         """Apply search/replace edit"""
@@ -376,26 +571,35 @@ class ShellRunner:
 # ============================================================================
 
 
+# Compiled once at import; parse_edits runs on every assistant message
+EDIT_BLOCK_PATTERN = re.compile(
+    r"""
+    (?P<filename>[\w\-./]+\.\w+)\s*
+    ```(?:\w+)?\s*
+    <<<<<<< \s* SEARCH\s*
+    (?P<search>.*?)
+    =======\s*
+    (?P<replace>.*?)
+    >>>>>>> \s* REPLACE\s*
+    ```
+    """,
+    re.DOTALL | re.VERBOSE,
+)
+
+
 class ResponseParser:
     """Parse LLM responses for edits"""
 
     @staticmethod
     def parse_edits(response: str) -> List[Tuple[str, str, str]]:
         """Parse search/replace blocks"""
-        edits = []
+        # Plain replies have no marker; skip the regex scan over them
+        if "<<<<<<<" not in response:
+            return []
 
-        pattern = r"""
-            (?P<filename>[\w\-./]+\.\w+)\s*
-            ```(?:\w+)?\s*
-            <<<<<<< \s* SEARCH\s*
-            (?P<search>.*?)
-            =======\s*
-            (?P<replace>.*?)
-            >>>>>>> \s* REPLACE\s*
-            ```
-        """
+        edits = []
 
-        for match in re.finditer(pattern, response, re.DOTALL | re.VERBOSE):
+        for match in EDIT_BLOCK_PATTERN.finditer(response):
             filename = match.group("filename")
             search = match.group("search").strip()
             replace = match.group("replace").strip()
@@ -409,6 +613,137 @@ class ResponseParser:
 # ============================================================================
 
 
+# Tool results are re-sent on every later request; keep each one bounded
+MAX_TOOL_RESULT_CHARS = 32_000
+
+
+def truncate_result(text: str, limit: int = MAX_TOOL_RESULT_CHARS) -> str:
+    """Keep the head and tail of an oversized tool result"""
+    if len(text) <= limit:
+        return text
+    half = limit // 2
+    omitted = len(text) - 2 * half
+    return f"{text[:half]}\n...[truncated {omitted} chars]...\n{text[-half:]}"
+
+
+# Backoff on 429s when the response carries no usable reset hint
+RATE_LIMIT_BASE_DELAY = 1.0
+RATE_LIMIT_MAX_DELAY = 60.0
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_duration(value: str) -> Optional[float]:
+    """Seconds from "12", "1.5s", "250ms" or "6m0s"; None if unparseable"""
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def rate_limit_delay(error: Exception, attempt: int) -> float:
+    """Seconds to wait before retrying a rate-limited request"""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        delay = parse_duration(retry_after_ms)
+        if delay is not None:
+            return min(delay / 1000, RATE_LIMIT_MAX_DELAY)
+
+    for name in ("retry-after", "x-ratelimit-reset-requests", "x-ratelimit-reset-tokens"):
+        value = headers.get(name)
+        delay = parse_duration(value) if value else None
+        if delay is not None:
+            return min(delay, RATE_LIMIT_MAX_DELAY)
+
+    # Exponential backoff with jitter so concurrent agents don't retry in lockstep
+    backoff = min(RATE_LIMIT_BASE_DELAY * 2 ** (attempt - 1), RATE_LIMIT_MAX_DELAY)
+    return random.uniform(backoff / 2, backoff)
+
+
+# Shared by every agent in the process: one event loop, one pooled HTTP
+# client and one OpenAI client, so TLS sessions and (with h2 installed)
+# HTTP/2 streams are reused across parallel subagents.
+HTTP_LIMITS = {"max_connections": 64, "max_keepalive_connections": 32}
+
+_event_loop: Optional[asyncio.AbstractEventLoop] = None
+_http_client = None
+_openai_client = None
+
+
+def shared_event_loop() -> asyncio.AbstractEventLoop:
+    global _event_loop
+    if _event_loop is None:
+        _event_loop = asyncio.new_event_loop()
+    return _event_loop
+
+
+def shared_http_client():
+    global _http_client
+    if _http_client is None:
+        import httpx
+
+        _http_client = httpx.AsyncClient(
+            http2=importlib.util.find_spec("h2") is not None,
+            limits=httpx.Limits(**HTTP_LIMITS),
+        )
+        atexit.register(_close_http_client)
+    return _http_client
+
+
+def shared_openai_client():
+    global _openai_client
+    if _openai_client is None:
+        # Imported lazily: the SDK pulls in httpx/pydantic
+        import openai
+
+        _openai_client = openai.AsyncOpenAI(
+            api_key=os.environ.get("OPENAI_API_KEY"), http_client=shared_http_client()
+        )
+    return _openai_client
+
+
+def _close_http_client():
+    if _http_client is not None and _event_loop is not None and not _event_loop.is_closed():
+        _event_loop.run_until_complete(_http_client.aclose())
+
+
+# ============================================================================
+# STREAMED RESPONSE
+# ============================================================================
+
+
+@dataclass(slots=True)
+class StreamFunction:
+    """Function part of a streamed tool call (mirrors the SDK's shape)"""
+
+    name: str
+    arguments: str
+
+
+@dataclass(slots=True)
+class StreamToolCall:
+    """Tool call assembled from streamed deltas"""
+
+    id: str
+    type: str
+    function: StreamFunction
+
+
+@dataclass(slots=True)
+class StreamResponse:
+    """Assistant message assembled from a completion stream"""
+
+    content: str
+    tool_calls: List[StreamToolCall]
+    tool_calls_dicts: List[Dict[str, Any]]  # same calls, in history/API shape
+
+
 class CodingAgentWithTools:
     """
     Production coding agent with structured tool support
@@ -427,11 +762,17 @@ class CodingAgentWithTools:
         self.tools = ToolRegistry()
 
         # State
-        self.files_in_context: List[str] = []
+        self.files_in_context: Dict[str, None] = {}  # ordered set
         self.interrupted = False
 
-        # OpenAI client
-        self.client = openai.OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+        self.client = shared_openai_client()
+        # The pooled client's connections belong to this loop; every turn runs on it
+        self._loop = shared_event_loop()
+        self._request_slots = asyncio.Semaphore(self.config.max_concurrency)
+        self._tool_slots = asyncio.Semaphore(self.config.max_tool_workers)
+        self._prompt = (
+            PromptSession() if PromptSession is not None and sys.stdin.isatty() else None
+        )
 
         # Register tools
         self._register_tools()
@@ -596,43 +937,16 @@ class CodingAgentWithTools:
     def _set_system_prompt(self):
         """Set the agent's system prompt"""
         if self.config.use_tools:
-            prompt = """You are an expert coding assistant with access to tools.
-
-You can:
-1. Read files with read_file(filepath)
-2. Write files with write_file(filepath, content)
-3. List files with list_files(pattern)
-4. Apply edits with apply_edit(filepath, search, replace)
-5. Run commands with run_command(command)
-6. Check git status with git_status()
-7. View git diff with git_diff()
-
-When making edits:
-- Use apply_edit() for targeted changes
-- Use write_file() for new files or complete rewrites
-- Always read_file() first to see current contents
-
-Be concise and helpful."""
+            prompt = SYSTEM_PROMPT_TOOLS
         else:
-            prompt = """You are an expert coding assistant. You can edit files using search/replace blocks:
-
-filename.py
-```python
-<<<<<<< SEARCH
-old code
-=======
-new code
->>>>>>> REPLACE
-```
-
-Be concise and helpful."""
+            prompt = SYSTEM_PROMPT_EDITS
 
         self.history.set_system_prompt(prompt)
 
     def add_file_to_context(self, filepath: str):
         """Add a file to the conversation context"""
         if filepath not in self.files_in_context:
-            self.files_in_context.append(filepath)
+            self.files_in_context[filepath] = None
 
             try:
                 content = self.files.read_file(filepath)
@@ -649,11 +963,11 @@ Be concise and helpful."""
         print()
 
         if initial_message:
-            self.process_user_message(initial_message)
+            self._loop.run_until_complete(self.process_user_message(initial_message))
 
         while True:
             try:
-                user_input = input("\n> ").strip()
+                user_input = self._read_input().strip()
 
                 if not user_input:
                     continue
@@ -664,7 +978,7 @@ Be concise and helpful."""
                     else:
                         break
 
-                self.process_user_message(user_input)
+                self._loop.run_until_complete(self.process_user_message(user_input))
 
             except KeyboardInterrupt:
                 print("\n\n⚠️  Interrupted")
@@ -674,10 +988,96 @@ Be concise and helpful."""
                 break
             except Exception as e:
                 print(f"\n❌ Error: {e}")
-                import traceback
-
                 traceback.print_exc()
 
+    def _read_input(self) -> str:
+        if self._prompt is None:
+            return input("\n> ")
+        return self._loop.run_until_complete(self._prompt_async())
+
+    async def _prompt_async(self) -> str:
+        print()
+        with patch_stdout():
+            return await self._prompt.prompt_async("> ")
+
+    def run_batch(self, message: str, files: List[str]):
+        """Run the message once per file through the Batch API (no tools)"""
+        self._loop.run_until_complete(self._run_batch(message, files))
+
+    async def _run_batch(self, message: str, files: List[str]):
+        targets = files or [None]
+        requests = []
+
+        for i, filepath in enumerate(targets):
+            messages = [{"role": "system", "content": self.history.system_prompt}]
+            if filepath:
+                content = self.files.read_file(filepath)
+                messages.append(
+                    {"role": "user", "content": f"=== {filepath} ===\n{content}\n"}
+                )
+            messages.append({"role": "user", "content": message})
+            requests.append(
+                {
+                    "custom_id": str(i),
+                    "method": "POST",
+                    "url": BATCH_ENDPOINT,
+                    "body": {
+                        "model": self.config.model,
+                        "messages": messages,
+                        "temperature": self.config.temperature,
+                        "max_tokens": self.config.max_tokens,
+                    },
+                }
+            )
+
+        payload = "\n".join(json_dumps(r) for r in requests).encode("utf-8")
+        batch_file = await self.client.files.create(
+            file=("batch.jsonl", payload), purpose="batch"
+        )
+        batch = await self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=BATCH_COMPLETION_WINDOW,
+        )
+        print(f"📦 Submitted batch {batch.id} ({len(requests)} request(s))")
+
+        batch = await self._wait_for_batch(batch.id)
+        if batch.status != "completed" or not batch.output_file_id:
+            print(f"❌ Batch {batch.id} finished with status: {batch.status}")
+            return
+
+        output = await self.client.files.content(batch.output_file_id)
+        results = {}
+        for line in output.text.splitlines():
+            if line.strip():
+                result = json_loads(line)
+                results[result["custom_id"]] = result
+
+        for i, filepath in enumerate(targets):
+            result = results.get(str(i))
+            label = filepath or "message"
+            body = ((result or {}).get("response") or {}).get("body") or {}
+            if not body.get("choices"):
+                error = (result or {}).get("error") or body.get("error")
+                print(f"\n❌ {label}: {error or 'no result'}")
+                continue
+
+            content = body["choices"][0]["message"].get("content") or ""
+            self.history.add_user_message(
+                f"[{filepath}] {message}" if filepath else message
+            )
+            self.history.add_assistant_message(content=content)
+            print(f"\n🤖 {label}:\n{content}")
+            self._apply_edits(content)
+
+    async def _wait_for_batch(self, batch_id: str):
+        while True:
+            batch = await self.client.batches.retrieve(batch_id)
+            if batch.status in BATCH_TERMINAL_STATUSES:
+                return batch
+            print(f"⏳ Batch {batch_id}: {batch.status}")
+            await asyncio.sleep(BATCH_POLL_INTERVAL)
+
     def _handle_command(self, command: str) -> bool:
         """Handle slash commands"""
         parts = command.split(maxsplit=1)
@@ -718,23 +1118,45 @@ Commands:
 
         return True
 
-    def process_user_message(self, message: str):
+    async def process_user_message(self, message: str):
         """
         Process message through the loop with tool support
         """
         self.history.add_user_message(message)
 
         # Send to LLM with tools
-        self._send_to_llm_with_tools()
+        await self._send_to_llm_with_tools()
 
-    def _send_to_llm_with_tools(self):
+    def _can_run_concurrently(self, tool_calls) -> bool:
+        """Only read-only tools may overlap; the rest prompt or mutate files"""
+        return len(tool_calls) > 1 and all(
+            tc.function.name in CONCURRENT_SAFE_TOOLS for tc in tool_calls
+        )
+
+    async def _send_to_llm_with_tools(self):
         """
         Send to LLM with tool support - handles tool calls in loop
         """
+        import openai
+
         messages = self.history.get_messages_for_api()
 
         max_iterations = 10  # Prevent infinite loops
         iteration = 0
+        rate_limit_retries = 0
+
+        # Config doesn't change during a turn: pick the request path once
+        request = (
+            self._handle_streaming_with_tools
+            if self.config.stream
+            else self._request_completion
+        )
+        tool_kwargs = {}
+        if self.config.use_tools:
+            tool_kwargs = {
+                "tools": self.tools.get_tool_schemas(),
+                "tool_choice": "auto",
+            }
 
         while iteration < max_iterations:
             iteration += 1
@@ -746,29 +1168,23 @@ Commands:
                     "messages": messages,
                     "temperature": self.config.temperature,
                     "max_tokens": self.config.max_tokens,
+                    **tool_kwargs,
                 }
 
-                # Add tools if enabled
-                if self.config.use_tools:
-                    api_kwargs["tools"] = self.tools.get_tool_schemas()
-                    api_kwargs["tool_choice"] = "auto"
-
                 # Make API call
-                if self.config.stream:
-                    response = self._handle_streaming_with_tools(api_kwargs)
-                else:
-                    completion = self.client.chat.completions.create(**api_kwargs)
-                    response = completion.choices[0].message
+                response = await request(api_kwargs)
+                rate_limit_retries = 0
 
                 # Check if we got tool calls
                 if hasattr(response, "tool_calls") and response.tool_calls:
                     # Execute tools
                     tool_calls = response.tool_calls
 
-                    # Add assistant message with tool calls
-                    self.history.add_assistant_message(
-                        content=response.content,
-                        tool_calls=[
+                    # Add assistant message with tool calls (streamed responses
+                    # already carry them as dicts)
+                    tool_calls_dicts = getattr(response, "tool_calls_dicts", None)
+                    if tool_calls_dicts is None:
+                        tool_calls_dicts = [
                             {
                                 "id": tc.id,
                                 "type": "function",
@@ -778,35 +1194,54 @@ Commands:
                                 },
                             }
                             for tc in tool_calls
-                        ],
+                        ]
+                    self.history.add_assistant_message(
+                        content=response.content, tool_calls=tool_calls_dicts
                     )
 
-                    # Execute each tool
+                    calls = []
                     for tool_call in tool_calls:
                         tool_name = tool_call.function.name
-                        tool_args = json.loads(tool_call.function.arguments)
+                        tool_args = json_loads(tool_call.function.arguments)
 
-                        print(
-                            f"\n🔧 Calling: {tool_name}({json.dumps(tool_args, indent=2)})"
+                        if self.config.debug:
+                            shown = json.dumps(tool_args, indent=2)
+                        else:
+                            shown = tool_call.function.arguments
+                        print(f"\n🔧 Calling: {tool_name}({shown})")
+                        calls.append((tool_name, tool_args))
+
+                    # Execute tools off the event loop
+                    if self._can_run_concurrently(tool_calls):
+                        results = await asyncio.gather(
+                            *(self._run_tool(name, args) for name, args in calls)
                         )
+                    else:
+                        results = [await self._run_tool(name, args) for name, args in calls]
 
-                        # Execute tool
-                        result = self.tools.execute_tool(tool_name, tool_args)
-                        result_str = json.dumps(result)
-
+                    tool_results = []
+                    for tool_call, (tool_name, _), result in zip(
+                        tool_calls, calls, results
+                    ):
                         # Show result
                         if result.get("success"):
                             print(f"✅ Result: {result.get('result', 'Success')[:200]}")
                         else:
                             print(f"❌ Error: {result.get('error')}")
 
-                        # Add tool result to history
-                        self.history.add_tool_result(
-                            tool_call_id=tool_call.id, name=tool_name, result=result_str
-                        )
+                        # Plain-text results skip the JSON round-trip
+                        payload = result.get("result")
+                        if result.get("success") and isinstance(payload, str):
+                            result_str = truncate_result(payload)
+                        else:
+                            result_str = truncate_result(json_dumps(result))
+
+                        tool_results.append((tool_call.id, tool_name, result_str))
+
+                    # Add the turn's tool results to history together
+                    self.history.extend_tool_results(tool_results)
 
-                    # Update messages and continue loop
-                    messages = self.history.get_messages_for_api()
+                    # `messages` is the live history list; it already has the results
                     continue
 
                 # No tool calls - we're done
@@ -818,93 +1253,116 @@ Commands:
 
                 break  # Exit loop
 
-            except openai.RateLimitError:
-                print("❌ Rate limit hit. Waiting...")
-                import time
-
-                time.sleep(5)
+            except openai.RateLimitError as e:
+                rate_limit_retries += 1
+                if rate_limit_retries > self.config.max_retries:
+                    print(f"❌ Rate limit hit. Giving up after {self.config.max_retries} retries")
+                    break
+                delay = rate_limit_delay(e, rate_limit_retries)
+                print(f"❌ Rate limit hit. Retrying in {delay:.1f}s...")
+                await asyncio.sleep(delay)
+                iteration -= 1  # retries don't use up tool-loop iterations
                 continue
 
             except Exception as e:
                 print(f"\n❌ Error calling LLM: {e}")
-                import traceback
-
                 traceback.print_exc()
                 break
 
-    def _handle_streaming_with_tools(self, api_kwargs: Dict) -> Any:
+    async def _run_tool(self, name: str, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Run a tool in a worker thread, bounded by max_tool_workers"""
+        async with self._tool_slots:
+            return await asyncio.to_thread(self.tools.execute_tool, name, args)
+
+    async def _request_completion(self, api_kwargs: Dict) -> Any:
+        """Non-streaming request; returns the assistant message"""
+        async with self._request_slots:
+            completion = await self.client.chat.completions.create(**api_kwargs)
+        return completion.choices[0].message
+
+    async def _handle_streaming_with_tools(self, api_kwargs: Dict) -> Any:
         """
         Handle streaming response with tool calls
         Note: OpenAI streaming with tools is complex - accumulate chunks
         """
-        stream = self.client.chat.completions.create(**api_kwargs, stream=True)
-
-        accumulated_content = ""
+        # Deltas are collected in lists and joined once; `+=` on str copies
+        # the whole buffer, which adds up for long write_file arguments.
+        content_parts = []
         accumulated_tool_calls = {}
 
         print("\n🤖 Assistant:", end=" ")
+        pending = 0
+        last_flush = time.monotonic()
+
+        # The slot is held until the stream is drained, so it bounds requests
+        # that are still in flight rather than just their initial call.
+        async with self._request_slots:
+            stream = await self.client.chat.completions.create(**api_kwargs, stream=True)
+            async for chunk in stream:
+                if self.interrupted:
+                    break
+
+                delta = chunk.choices[0].delta
+
+                # Accumulate content
+                if delta.content:
+                    content = delta.content
+                    sys.stdout.write(content)
+                    pending += len(content)
+                    now = time.monotonic()
+                    if (
+                        pending >= STREAM_FLUSH_CHARS
+                        or content.endswith("\n")
+                        or now - last_flush >= STREAM_FLUSH_INTERVAL
+                    ):
+                        sys.stdout.flush()
+                        pending = 0
+                        last_flush = now
+                    content_parts.append(content)
+
+                # Accumulate tool calls
+                if delta.tool_calls:
+                    for tc in delta.tool_calls:
+                        idx = tc.index
+
+                        if idx not in accumulated_tool_calls:
+                            accumulated_tool_calls[idx] = {
+                                "id": "",
+                                "type": "function",
+                                "function": {"name": "", "arguments": []},
+                            }
 
-        for chunk in stream:
-            if self.interrupted:
-                break
-
-            delta = chunk.choices[0].delta
-
-            # Accumulate content
-            if delta.content:
-                content = delta.content
-                print(content, end="", flush=True)
-                accumulated_content += content
-
-            # Accumulate tool calls
-            if delta.tool_calls:
-                for tc in delta.tool_calls:
-                    idx = tc.index
-
-                    if idx not in accumulated_tool_calls:
-                        accumulated_tool_calls[idx] = {
-                            "id": "",
-                            "type": "function",
-                            "function": {"name": "", "arguments": ""},
-                        }
-
-                    if tc.id:
-                        accumulated_tool_calls[idx]["id"] = tc.id
-                    if tc.function.name:
-                        accumulated_tool_calls[idx]["function"][
-                            "name"
-                        ] = tc.function.name
-                    if tc.function.arguments:
-                        accumulated_tool_calls[idx]["function"][
-                            "arguments"
-                        ] += tc.function.arguments
-
-        print()  # Newline
-
-        # Create response object
-        class Response:
-            def __init__(self, content, tool_calls):
-                self.content = content
-                self.tool_calls = []
-
-                # Convert accumulated tool calls to proper format
-                for tc_data in tool_calls.values():
-
-                    class ToolCall:
-                        def __init__(self, data):
-                            self.id = data["id"]
-                            self.type = data["type"]
-
-                            class Function:
-                                def __init__(self, func_data):
-                                    self.name = func_data["name"]
-                                    self.arguments = func_data["arguments"]
-
-                            self.function = Function(data["function"])
-
-                    self.tool_calls.append(ToolCall(tc_data))
-
-        return Response(accumulated_content, accumulated_tool_calls)
+                        if tc.id:
+                            accumulated_tool_calls[idx]["id"] = tc.id
+                        if tc.function.name:
+                            accumulated_tool_calls[idx]["function"][
+                                "name"
+                            ] = tc.function.name
+                        if tc.function.arguments:
+                            accumulated_tool_calls[idx]["function"][
+                                "arguments"
+                            ].append(tc.function.arguments)
+
+        print(flush=True)  # Newline
+
+        tool_calls_dicts = list(accumulated_tool_calls.values())
+        for tc_data in tool_calls_dicts:
+            tc_data["function"]["arguments"] = "".join(tc_data["function"]["arguments"])
+
+        return StreamResponse(
+            "".join(content_parts),
+            [
+                StreamToolCall(
+                    tc_data["id"],
+                    tc_data["type"],
+                    StreamFunction(
+                        tc_data["function"]["name"], tc_data["function"]["arguments"]
+                    ),
+                )
+                for tc_data in tool_calls_dicts
+            ],
+            tool_calls_dicts,
+        )
 
     def _apply_edits(self, response: str):
         """Parse and apply edits from text (fallback)"""
@@ -915,20 +1373,38 @@ Commands:
 
         print(f"\n📝 Applying {len(edits)} edit(s)...")
 
-        edited_files = []
+        if self.config.dry_run:
+            for filename, _, _ in edits:
+                print(f"  Editing {filename}...")
+                print(f"    [DRY RUN] Would edit {filename}")
+            return
 
-        for filename, search, replace in edits:
-            print(f"  Editing {filename}...")
+        # Files are independent; edits to the same file stay in order
+        by_file: Dict[str, List[int]] = {}
+        for index, (filename, _, _) in enumerate(edits):
+            by_file.setdefault(filename, []).append(index)
 
-            if self.config.dry_run:
-                print(f"    [DRY RUN] Would edit {filename}")
-                continue
+        def apply_file(indices: List[int]) -> List[bool]:
+            return [self.files.apply_edit(*edits[index]) for index in indices]
+
+        results = [False] * len(edits)
+        workers = min(self.config.max_edit_workers, len(by_file))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for indices, outcomes in zip(
+                by_file.values(), pool.map(apply_file, by_file.values())
+            ):
+                for index, success in zip(indices, outcomes):
+                    results[index] = success
 
-            success = self.files.apply_edit(filename, search, replace)
+        edited_files = []
+
+        for (filename, _, _), success in zip(edits, results):
+            print(f"  Editing {filename}...")
 
             if success:
                 print(f"  ✅ {filename} updated")
-                edited_files.append(filename)
+                if filename not in edited_files:
+                    edited_files.append(filename)
             else:
                 print(f"  ❌ Failed to edit {filename}")
 
@@ -963,11 +1439,22 @@ def main():
     parser.add_argument(
         "--no-tools", action="store_true", help="Disable structured tools"
     )
+    parser.add_argument(
+        "--debug", action="store_true", help="Pretty-print tool call arguments"
+    )
     parser.add_argument("files", nargs="*", help="Files to add to context")
     parser.add_argument("--message", "-m", help="Initial message")
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Submit --message for each file via the OpenAI Batch API (no tools)",
+    )
 
     args = parser.parse_args()
 
+    if args.batch and not args.message:
+        parser.error("--batch requires --message")
+
     if not os.environ.get("OPENAI_API_KEY"):
         print("❌ Error: OPENAI_API_KEY environment variable not set")
         sys.exit(1)
@@ -977,7 +1464,8 @@ def main():
         stream=not args.no_stream,
         dry_run=args.dry_run,
         auto_commit=not args.no_auto_commit,
-        use_tools=not args.no_tools,
+        use_tools=not args.no_tools and not args.batch,
+        debug=args.debug,
     )
 
     try:
@@ -994,6 +1482,10 @@ def main():
 
     agent = CodingAgentWithTools(root_path, config)
 
+    if args.batch:
+        agent.run_batch(args.message, args.files)
+        return
+
     for filepath in args.files:
         agent.add_file_to_context(filepath)
 
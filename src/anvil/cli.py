@@ -2,30 +2,118 @@ from __future__ import annotations
 
 import argparse
 import logging
+import os
+import re
 import subprocess
 import sys
 import time
+from datetime import datetime, timezone
 from pathlib import Path
-from urllib.parse import urlparse
+from types import MappingProxyType
 
-from dotenv import load_dotenv
-
-from anvil.config import AgentConfig, resolve_model_alias
-from anvil.modes.registry import get_mode, list_modes
-from anvil.runtime.repl import AnvilREPL
-from anvil.runtime.runtime import AnvilRuntime
+from common import jsonio
 
 
 def main() -> int:
-    load_dotenv()
+    _load_dotenv_cached()
     return _main(sys.argv[1:])
 
 
+def _dotenv_cache_path() -> Path:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return Path(base) / "anvil" / "dotenv.json"
+
+
+def _find_dotenv() -> str | None:
+    # Same lookup as a bare load_dotenv() call from this module: the nearest
+    # .env at or above the directory this file lives in.
+    directory = os.path.dirname(os.path.abspath(__file__))
+    while True:
+        candidate = os.path.join(directory, ".env")
+        if os.path.isfile(candidate):
+            return candidate
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return None
+        directory = parent
+
+
+def _load_dotenv_cached() -> None:
+    # Parsed values are reused while .env keeps its mtime and size, so most
+    # startups neither import python-dotenv nor parse the file. Existing
+    # environment variables win, as with load_dotenv().
+    path = _find_dotenv()
+    if path is None:
+        return
+    try:
+        st = os.stat(path)
+    except OSError:
+        return
+    key = [path, st.st_mtime_ns, st.st_size]
+    cache_path = _dotenv_cache_path()
+
+    cached = jsonio.load_json(cache_path)
+    if isinstance(cached, dict) and cached.get("key") == key:
+        values = cached.get("values") or {}
+    else:
+        from dotenv import dotenv_values
+
+        values = {k: v for k, v in dotenv_values(path).items() if v is not None}
+        # Values expanded from ${VARS} depend on the environment at the time.
+        if "$" not in Path(path).read_text(encoding="utf-8", errors="ignore"):
+            _write_dotenv_cache(cache_path, {"key": key, "values": values})
+
+    for name, value in values.items():
+        os.environ.setdefault(name, value)
+
+
+def _write_dotenv_cache(cache_path: Path, data: dict) -> None:
+    # The cache holds secrets: keep it readable by the owner only.
+    try:
+        cache_path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        tmp_path = cache_path.with_suffix(".tmp")
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            handle.write(jsonio.dumps(data))
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass
+
+
 def _utc_ts() -> str:
-    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return now.isoformat(timespec="seconds") + "Z"
+
+
+def _log(stage: str, msg: str) -> None:
+    now = datetime.now().isoformat(sep=" ", timespec="seconds")
+    print(f"{now} [{stage}] {msg}", file=sys.stderr)
+
+
+def _find_git_root(start: Path) -> Path | None:
+    # The nearest ancestor with a .git directory (or a worktree/submodule
+    # .git file pointing at one); None when unsure so git can decide.
+    if ".git" in start.parts:
+        return None
+    for directory in (start, *start.parents):
+        marker = directory / ".git"
+        if marker.is_dir():
+            return directory if (marker / "HEAD").exists() else None
+        if marker.is_file():
+            try:
+                first_line = marker.read_text(encoding="utf-8").splitlines()[0]
+            except (OSError, UnicodeDecodeError, IndexError):
+                return None
+            return directory if first_line.startswith("gitdir:") else None
+    return None
 
 
 def _git_root_or_exit() -> str:
+    if not any(name in os.environ for name in ("GIT_DIR", "GIT_WORK_TREE", "ANVIL_GIT_SUBPROCESS")):
+        root = _find_git_root(Path.cwd())
+        if root is not None:
+            return str(root)
+
     try:
         result = subprocess.run(
             ["git", "rev-parse", "--show-toplevel"],
@@ -39,11 +127,9 @@ def _git_root_or_exit() -> str:
         raise SystemExit(1)
 
 
-def _build_parser() -> argparse.ArgumentParser:
-    parser = argparse.ArgumentParser(prog="anvil", description="Anvil - AI Agent")
-    subparsers = parser.add_subparsers(dest="command", required=False)
+def _add_repl_arguments(repl: argparse.ArgumentParser) -> None:
+    from anvil.modes.registry import list_modes
 
-    repl = subparsers.add_parser("repl", help="Start interactive agent REPL")
     repl.add_argument(
         "--model",
         default="gpt-4o",
@@ -54,17 +140,22 @@ def _build_parser() -> argparse.ArgumentParser:
     repl.add_argument("--no-auto-commit", action="store_true", help="Don't auto-commit")
     repl.add_argument("--no-tools", action="store_true", help="Disable structured tools")
     repl.add_argument("--no-lint", action="store_true", help="Disable auto-linting after edits")
+    repl.add_argument(
+        "--no-cache", action="store_true", help="Disable the response cache for tool-free runs"
+    )
     repl.add_argument("--mode", default="coding", choices=list_modes())
     repl.add_argument("--message", "-m", help="Single prompt (non-interactive)")
     repl.add_argument("files", nargs="*", help="Files to add to context")
 
-    code = subparsers.add_parser("code", help="Run a coding task (non-interactive)")
+
+def _add_code_arguments(code: argparse.ArgumentParser) -> None:
     code.add_argument("task")
     code.add_argument("files", nargs="*")
     code.add_argument("--model", default="gpt-4o")
     code.add_argument("--max-iterations", type=int, default=10)
 
-    fetch = subparsers.add_parser("fetch", help="Fetch raw documents (Scout fetch-only)")
+
+def _add_fetch_arguments(fetch: argparse.ArgumentParser) -> None:
     fetch.add_argument("topic", nargs="?", help="Topic to search (required unless --resume)")
     fetch.add_argument(
         "--source",
@@ -80,7 +171,8 @@ def _build_parser() -> argparse.ArgumentParser:
     fetch.add_argument("--resume", default=None, help="Resume an existing session id")
     fetch.add_argument("-v", "--verbose", action="store_true")
 
-    research = subparsers.add_parser("research", help="Deep research (Tavily + orchestrator-workers)")
+
+def _add_research_arguments(research: argparse.ArgumentParser) -> None:
     research.add_argument("query", nargs="?", help="Research query (required unless --resume)")
     research.add_argument("--profile", default="quick", choices=["quick", "deep"])
     research.add_argument("--model", default="gpt-4o")
@@ -140,7 +232,8 @@ def _build_parser() -> argparse.ArgumentParser:
         help="Fail if report coverage targets (citations/domains) are missed after repair",
     )
 
-    sessions = subparsers.add_parser("sessions", help="List/open session artifacts")
+
+def _add_sessions_arguments(sessions: argparse.ArgumentParser) -> None:
     sessions.add_argument("--data-dir", default="data/sessions")
     sessions_sub = sessions.add_subparsers(dest="sessions_cmd", required=False)
 
@@ -166,28 +259,55 @@ def _build_parser() -> argparse.ArgumentParser:
     sessions_paths = sessions_sub.add_parser("paths", help="Print common artifact paths for a session")
     sessions_paths.add_argument("session_id")
 
-    gui = subparsers.add_parser("gui", help="Launch Gradio web interface")
+
+def _add_gui_arguments(gui: argparse.ArgumentParser) -> None:
     gui.add_argument("--port", type=int, default=7860)
     gui.add_argument("--share", action="store_true", help="Create public link")
 
+
+_SUBCOMMANDS = {
+    "repl": ("Start interactive agent REPL", _add_repl_arguments),
+    "code": ("Run a coding task (non-interactive)", _add_code_arguments),
+    "fetch": ("Fetch raw documents (Scout fetch-only)", _add_fetch_arguments),
+    "research": ("Deep research (Tavily + orchestrator-workers)", _add_research_arguments),
+    "sessions": ("List/open session artifacts", _add_sessions_arguments),
+    "gui": ("Launch Gradio web interface", _add_gui_arguments),
+}
+
+
+def _build_parser(command: str | None = None) -> argparse.ArgumentParser:
+    # Every subcommand is listed for `anvil --help`, but only the one being
+    # run gets its arguments; building all of them is most of argparse's cost.
+    parser = argparse.ArgumentParser(prog="anvil", description="Anvil - AI Agent")
+    subparsers = parser.add_subparsers(dest="command", required=False)
+    for name, (help_text, add_arguments) in _SUBCOMMANDS.items():
+        subparser = subparsers.add_parser(name, help=help_text)
+        if command is None or command == name:
+            add_arguments(subparser)
     return parser
 
 
+# Bare `anvil` starts the REPL with these settings and never builds a parser.
+_REPL_DEFAULTS = MappingProxyType(
+    {
+        "model": "gpt-4o",
+        "mode": "coding",
+        "message": None,
+        "no_stream": False,
+        "dry_run": False,
+        "no_auto_commit": False,
+        "no_tools": False,
+        "no_lint": False,
+        "no_cache": False,
+    }
+)
+
+
 def _main(argv: list[str]) -> int:
     if not argv:
-        return _cmd_repl(
-            model="gpt-4o",
-            mode="coding",
-            files=[],
-            message=None,
-            no_stream=False,
-            dry_run=False,
-            no_auto_commit=False,
-            no_tools=False,
-            no_lint=False,
-        )
+        return _cmd_repl(files=[], **_REPL_DEFAULTS)
 
-    parser = _build_parser()
+    parser = _build_parser(argv[0] if argv[0] in _SUBCOMMANDS else None)
     args = parser.parse_args(argv)
 
     cmd = args.command or "repl"
@@ -202,20 +322,13 @@ def _main(argv: list[str]) -> int:
             no_auto_commit=bool(args.no_auto_commit),
             no_tools=bool(args.no_tools),
             no_lint=bool(args.no_lint),
+            no_cache=bool(args.no_cache),
         )
-    if cmd == "code":
-        return _cmd_code(args)
-    if cmd == "fetch":
-        return _cmd_fetch(args)
-    if cmd == "research":
-        return _cmd_research(args)
-    if cmd == "sessions":
-        return _cmd_sessions(args)
-    if cmd == "gui":
-        return _cmd_gui(args)
-
-    parser.print_help(sys.stderr)
-    return 2
+    handler = _DISPATCH.get(cmd)
+    if handler is None:
+        parser.print_help(sys.stderr)
+        return 2
+    return handler(args)
 
 
 def _cmd_repl(
@@ -229,7 +342,13 @@ def _cmd_repl(
     no_auto_commit: bool,
     no_tools: bool,
     no_lint: bool,
+    no_cache: bool,
 ) -> int:
+    from anvil.config import AgentConfig, resolve_model_alias
+    from anvil.modes.registry import get_mode
+    from anvil.runtime.repl import AnvilREPL
+    from anvil.runtime.runtime import AnvilRuntime
+
     config = AgentConfig(
         model=resolve_model_alias(model),
         stream=not no_stream,
@@ -237,6 +356,7 @@ def _cmd_repl(
         auto_commit=not bool(no_auto_commit),
         use_tools=not bool(no_tools),
         auto_lint=not bool(no_lint),
+        use_cache=not bool(no_cache),
     )
     root_path = _git_root_or_exit()
     runtime = AnvilRuntime(root_path, config, mode=get_mode(mode))
@@ -253,6 +373,7 @@ def _cmd_repl(
 
 
 def _cmd_code(args) -> int:
+    from anvil.config import resolve_model_alias
     from anvil.services.coding import CodingConfig, CodingService
 
     root_path = _git_root_or_exit()
@@ -358,15 +479,101 @@ def _cmd_fetch(args) -> int:
     return 0
 
 
-def _cmd_research(args) -> int:
-    import os
+_NETLOC_END = re.compile(r"[/?#]")
+
+
+def _netloc(url: str) -> str:
+    # urlparse(url).netloc for the http(s) URLs counted in research reports,
+    # without building a ParseResult per URL.
+    start = url.find("//")
+    if start == -1:
+        return ""
+    start += 2
+    end = _NETLOC_END.search(url, start)
+    return url[start : end.start()] if end else url[start:]
+
+
+_RESEARCH_DEFAULTS_DEEP = MappingProxyType(
+    {
+        "max_workers": 6,
+        "worker_iterations": 12,
+        "worker_timeout": 300.0,
+        "max_rounds": 3,
+        "max_tasks_total": 12,
+        "max_tasks_per_round": 6,
+        "verify_tasks_round3": 2,
+        "page_size": 10,
+        "max_pages": 4,
+        "target_web_search_calls": 4,
+        "max_web_search_calls": 8,
+        "max_web_extract_calls": 3,
+        "extract_max_chars": 20000,
+        "min_citations": 15,
+        "min_domains": 6,
+        "report_min_citations": 20,
+        "report_min_domains": 6,
+        "report_findings": 8,
+        "coverage_mode": "error",
+        "curated_sources_max_total": 0,
+        "curated_sources_max_per_domain": 0,
+        "curated_sources_min_per_task": 0,
+        "enable_worker_continuation": True,
+        "max_worker_continuations": 2,
+        "enable_deep_read": True,
+        "require_quote_per_claim": True,
+        "multi_pass_synthesis": True,
+    }
+)
+
+_RESEARCH_DEFAULTS_QUICK = MappingProxyType(
+    {
+        "max_workers": 3,
+        "worker_iterations": 6,
+        "worker_timeout": 120.0,
+        "max_rounds": 1,
+        "max_tasks_total": 5,
+        "max_tasks_per_round": 5,
+        "verify_tasks_round3": 0,
+        "page_size": 6,
+        "max_pages": 2,
+        "target_web_search_calls": 2,
+        "max_web_search_calls": 4,
+        "max_web_extract_calls": 0,
+        "extract_max_chars": 20000,
+        "min_citations": 3,
+        "min_domains": 3,
+        "report_min_citations": 8,
+        "report_min_domains": 3,
+        "report_findings": 5,
+        "coverage_mode": "warn",
+        "curated_sources_max_total": 30,
+        "curated_sources_max_per_domain": 2,
+        "curated_sources_min_per_task": 3,
+        "enable_worker_continuation": False,
+        "max_worker_continuations": 0,
+        "enable_deep_read": False,
+        "require_quote_per_claim": False,
+        "multi_pass_synthesis": False,
+    }
+)
 
+
+def _cmd_research(args) -> int:
     query = (args.query or "").strip()
     resume_id = (args.resume or "").strip() or None
     if not query and not resume_id:
         print("Error: query is required (or use `anvil research --resume <session_id>`)", file=sys.stderr)
         return 2
 
+    # Flag errors first: they need no imports, git or network checks.
+    curated_args = (args.curated_max_total, args.curated_max_per_domain, args.curated_min_per_task)
+    if any(v is not None and int(v) < 0 for v in curated_args):
+        print("Error: curated pack arguments must be >= 0", file=sys.stderr)
+        return 2
+    if bool(args.coverage_warn) and bool(args.coverage_strict):
+        print("Error: choose only one of --coverage-warn or --coverage-strict", file=sys.stderr)
+        return 2
+
     missing_key = not bool(os.environ.get("TAVILY_API_KEY"))
     try:
         import tavily  # type: ignore[import-not-found]  # noqa: F401
@@ -382,6 +589,9 @@ def _cmd_research(args) -> int:
             print("Error: `TAVILY_API_KEY` is not set (add it to `.env` or export it).", file=sys.stderr)
         return 2
 
+    from anvil.config import AgentConfig, resolve_model_alias
+    from anvil.modes.registry import get_mode
+    from anvil.runtime.runtime import AnvilRuntime
     from anvil.sessions.meta import load_meta, write_meta
     from anvil.subagents.parallel import ParallelWorkerRunner
     from anvil.workflows.deep_research import (
@@ -393,27 +603,17 @@ def _cmd_research(args) -> int:
     from anvil.workflows.deep_research_resume import resume_deep_research
     from anvil.workflows.research_artifacts import make_research_session_dir, write_json, write_text
     from anvil.workflows.research_persist import persist_research_outcome
-    from common.events import EventEmitter, ProgressEvent
+    from common.events import EventEmitter, ProgressEvent, ResearchPlanEvent, WorkerCompletedEvent
     from common.ids import generate_id
 
+    model = resolve_model_alias(args.model)
     root_path = _git_root_or_exit()
-    runtime = AnvilRuntime(
-        root_path,
-        AgentConfig(model=resolve_model_alias(args.model), stream=False, use_tools=True),
-        mode=get_mode("coding"),
-    )
-
-    def _log(stage: str, msg: str) -> None:
-        now = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
-        print(f"{now} [{stage}] {msg}", file=sys.stderr)
 
     def on_event(event) -> None:
         if isinstance(event, ProgressEvent):
             msg = event.message or event.stage
             _log(event.stage, msg)
             return
-        from common.events import ResearchPlanEvent, WorkerCompletedEvent
-
         if isinstance(event, ResearchPlanEvent):
             _log("plan", f"Planned {len(event.tasks)} tasks")
             for t in event.tasks[:20]:
@@ -440,66 +640,7 @@ def _cmd_research(args) -> int:
     def _p(v, default):
         return default if v is None else v
 
-    if profile == "deep":
-        defaults = {
-            "max_workers": 6,
-            "worker_iterations": 12,
-            "worker_timeout": 300.0,
-            "max_rounds": 3,
-            "max_tasks_total": 12,
-            "max_tasks_per_round": 6,
-            "verify_tasks_round3": 2,
-            "page_size": 10,
-            "max_pages": 4,
-            "target_web_search_calls": 4,
-            "max_web_search_calls": 8,
-            "max_web_extract_calls": 3,
-            "extract_max_chars": 20000,
-            "min_citations": 15,
-            "min_domains": 6,
-            "report_min_citations": 20,
-            "report_min_domains": 6,
-            "report_findings": 8,
-            "coverage_mode": "error",
-            "curated_sources_max_total": 0,
-            "curated_sources_max_per_domain": 0,
-            "curated_sources_min_per_task": 0,
-            "enable_worker_continuation": True,
-            "max_worker_continuations": 2,
-            "enable_deep_read": True,
-            "require_quote_per_claim": True,
-            "multi_pass_synthesis": True,
-        }
-    else:
-        defaults = {
-            "max_workers": 3,
-            "worker_iterations": 6,
-            "worker_timeout": 120.0,
-            "max_rounds": 1,
-            "max_tasks_total": 5,
-            "max_tasks_per_round": 5,
-            "verify_tasks_round3": 0,
-            "page_size": 6,
-            "max_pages": 2,
-            "target_web_search_calls": 2,
-            "max_web_search_calls": 4,
-            "max_web_extract_calls": 0,
-            "extract_max_chars": 20000,
-            "min_citations": 3,
-            "min_domains": 3,
-            "report_min_citations": 8,
-            "report_min_domains": 3,
-            "report_findings": 5,
-            "coverage_mode": "warn",
-            "curated_sources_max_total": 30,
-            "curated_sources_max_per_domain": 2,
-            "curated_sources_min_per_task": 3,
-            "enable_worker_continuation": False,
-            "max_worker_continuations": 0,
-            "enable_deep_read": False,
-            "require_quote_per_claim": False,
-            "multi_pass_synthesis": False,
-        }
+    defaults = _RESEARCH_DEFAULTS_DEEP if profile == "deep" else _RESEARCH_DEFAULTS_QUICK
 
     max_workers = int(_p(args.max_workers, defaults["max_workers"]))
     worker_iterations = int(_p(args.worker_iterations, defaults["worker_iterations"]))
@@ -531,12 +672,6 @@ def _cmd_research(args) -> int:
         curated_sources_max_per_domain = int(args.curated_max_per_domain)
     if args.curated_min_per_task is not None:
         curated_sources_min_per_task = int(args.curated_min_per_task)
-    if curated_sources_max_total < 0 or curated_sources_max_per_domain < 0 or curated_sources_min_per_task < 0:
-        print("Error: curated pack arguments must be >= 0", file=sys.stderr)
-        return 2
-    if bool(args.coverage_warn) and bool(args.coverage_strict):
-        print("Error: choose only one of --coverage-warn or --coverage-strict", file=sys.stderr)
-        return 2
     if bool(args.coverage_warn):
         coverage_mode = "warn"
     if bool(args.coverage_strict):
@@ -547,11 +682,35 @@ def _cmd_research(args) -> int:
     require_quote_per_claim = bool(defaults["require_quote_per_claim"])
     multi_pass_synthesis = bool(defaults["multi_pass_synthesis"])
 
+    session_id = (args.session_id or "").strip() or generate_id()
+    if resume_id:
+        session_id = resume_id
+    session_dir = make_research_session_dir(data_dir=args.data_dir, session_id=session_id)
+    meta_path = session_dir / "meta.json"
+
+    existing_meta = load_meta(data_dir=args.data_dir, session_id=session_id) if resume_id else None
+    if resume_id and not query:
+        query = str((existing_meta or {}).get("query") or "").strip()
+        if not query:
+            print(
+                f"Error: missing query; provide it explicitly or ensure `{meta_path}` contains `query`",
+                file=sys.stderr,
+            )
+            return 2
+
+    # Built only once the run is known to go ahead; the runtime sets up the
+    # mode, tools and model client.
+    runtime = AnvilRuntime(
+        root_path,
+        AgentConfig(model=model, stream=False, use_tools=True),
+        mode=get_mode("coding"),
+    )
+
     workflow = DeepResearchWorkflow(
         subagent_runner=runtime.subagent_runner,
         parallel_runner=ParallelWorkerRunner(runtime.subagent_runner),
         config=DeepResearchConfig(
-            model=resolve_model_alias(args.model),
+            model=model,
             max_workers=max_workers,
             worker_max_iterations=worker_iterations,
             worker_timeout_s=worker_timeout,
@@ -587,29 +746,13 @@ def _cmd_research(args) -> int:
         emitter=EventEmitter(on_event),
     )
 
-    session_id = (args.session_id or "").strip() or generate_id()
-    if resume_id:
-        session_id = resume_id
-    session_dir = make_research_session_dir(data_dir=args.data_dir, session_id=session_id)
-    meta_path = session_dir / "meta.json"
-
-    existing_meta = load_meta(data_dir=args.data_dir, session_id=session_id) if resume_id else None
-    if resume_id and not query:
-        query = str((existing_meta or {}).get("query") or "").strip()
-        if not query:
-            print(
-                f"Error: missing query; provide it explicitly or ensure `{meta_path}` contains `query`",
-                file=sys.stderr,
-            )
-            return 2
-
     meta = dict(existing_meta or {})
     meta.update(
         {
             "kind": "research",
             "session_id": session_id,
             "query": query,
-            "model": resolve_model_alias(args.model),
+            "model": model,
             "status": "running",
             "config": {
                 "profile": profile,
@@ -726,7 +869,7 @@ def _cmd_research(args) -> int:
                                 u = e.get("url")
                                 if isinstance(u, str) and u.startswith("http"):
                                     report_urls.add(u)
-        report_domains = {urlparse(u).netloc for u in report_urls}
+        report_domains = {_netloc(u) for u in report_urls}
         quality = "good" if (len(report_urls) >= report_min_citations and len(report_domains) >= report_min_domains) else "limited"
         reason = ""
         if quality != "good":
@@ -885,5 +1028,15 @@ def _cmd_gui(args) -> int:
     return 0
 
 
+# `repl` is handled in _main: it takes keyword arguments, not the namespace.
+_DISPATCH = {
+    "code": _cmd_code,
+    "fetch": _cmd_fetch,
+    "research": _cmd_research,
+    "sessions": _cmd_sessions,
+    "gui": _cmd_gui,
+}
+
+
 if __name__ == "__main__":
     raise SystemExit(main())
@@ -28,3 +28,8 @@ class AgentConfig:
     use_tools: bool = True
     auto_lint: bool = True
     lint_fix_retries: int = 2
+    use_cache: bool = True
+    # Seconds a cached response may be replayed; None keeps entries forever.
+    cache_ttl: float | None = 7 * 24 * 3600
+    # Estimated prompt tokens kept in history; None derives it from the model.
+    history_token_budget: int | None = None
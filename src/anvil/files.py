@@ -1,5 +1,13 @@
+import mmap
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from fnmatch import fnmatchcase
 from pathlib import Path
-from typing import List, Optional, Set
+from typing import Dict, List, Optional, Set, Tuple
 
 
 IGNORED_DIRS: Set[str] = {
@@ -19,103 +27,375 @@ IGNORED_DIRS: Set[str] = {
 
 MAX_FILES = 500
 
+# Decoded file contents kept in memory, validated by (mtime_ns, size).
+READ_CACHE_SIZE = 128
+
+# Line-range reads of uncached files at least this large map the file and
+# decode only the requested lines.
+MMAP_MIN_BYTES = 1 << 20
+
+# Whole-file reads for the read_file tool stop after this many bytes; larger
+# files are paged with offset/limit instead of being loaded and then clipped.
+MAX_READ_BYTES = 256 * 1024
+
+# Listings are reused until a write through this manager or the TTL expires
+# (files created by shell commands or editors are picked up after the TTL).
+LIST_CACHE_SIZE = 64
+LIST_CACHE_TTL = 5.0
+
+# Distinct files edited at once by apply_edits.
+EDIT_WORKERS = 8
+
+# Minimum rapidfuzz ratio (0-100) for an approximate line-window match.
+FUZZY_MATCH_THRESHOLD = 95.0
+
 
 class FileManager:
     def __init__(self, root_path: str):
         self.root_path = Path(root_path)
+        self._root = os.fspath(self.root_path)
+        self._cache: "OrderedDict[str, Tuple[Tuple[int, int], str]]" = OrderedDict()
+        self._listings: "OrderedDict[str, Tuple[int, float, List[str]]]" = OrderedDict()
+        self._generation = 0
+        # read_file/list_files run concurrently from the tool thread pool.
+        self._lock = threading.Lock()
+
+    def read_file(self, filepath: str, max_bytes: Optional[int] = None) -> str:
+        full_path = os.path.join(self._root, filepath)
+        try:
+            st = os.stat(full_path)
+            key = (st.st_mtime_ns, st.st_size)
+            content = self._cached(full_path, key)
+            if content is not None:
+                if max_bytes is not None and st.st_size > max_bytes:
+                    return _truncated(content[:max_bytes], filepath, st.st_size)
+                return content
+
+            if max_bytes is not None and st.st_size > max_bytes:
+                head = _read_bytes(full_path, max_bytes).decode("utf-8", errors="ignore")
+                return _truncated(_normalize_newlines(head), filepath, st.st_size)
 
-    def read_file(self, filepath: str) -> str:
-        full_path = self.root_path / filepath
+            content = _normalize_newlines(_read_bytes(full_path, st.st_size).decode("utf-8"))
+            self._remember(full_path, key, content)
+            return content
+        except Exception as e:
+            raise Exception(f"Error reading {filepath}: {str(e)}")
+
+    def read_lines(self, filepath: str, offset: int = 1, limit: Optional[int] = None) -> str:
+        full_path = os.path.join(self._root, filepath)
         try:
-            return full_path.read_text()
+            st = os.stat(full_path)
+            cached = self._cache.get(full_path)
+            fresh = cached is not None and cached[0] == (st.st_mtime_ns, st.st_size)
+            if fresh or st.st_size < MMAP_MIN_BYTES:
+                content = self.read_file(filepath)
+                start, end = _line_span(content, "\n", offset, limit)
+                return content[start:end]
+
+            with open(full_path, "rb") as handle:
+                with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    start, end = _line_span(mapped, b"\n", offset, limit)
+                    return _normalize_newlines(mapped[start:end].decode("utf-8"))
         except Exception as e:
             raise Exception(f"Error reading {filepath}: {str(e)}")
 
     def write_file(self, filepath: str, content: str):
-        full_path = self.root_path / filepath
+        full_path = os.path.join(self._root, filepath)
         try:
-            full_path.parent.mkdir(parents=True, exist_ok=True)
-            full_path.write_text(content)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            with open(full_path, "wb") as handle:
+                handle.write(content.encode("utf-8"))
+            st = os.stat(full_path)
+            self._remember(full_path, (st.st_mtime_ns, st.st_size), content)
         except Exception as e:
+            self._cache.pop(full_path, None)
             raise Exception(f"Error writing {filepath}: {str(e)}")
+        finally:
+            with self._lock:
+                self._generation += 1
+
+    def _cached(self, full_path: str, key: Tuple[int, int]) -> Optional[str]:
+        with self._lock:
+            cached = self._cache.get(full_path)
+            if cached is None or cached[0] != key:
+                return None
+            self._cache.move_to_end(full_path)
+            return cached[1]
+
+    def _remember(self, full_path: str, key: Tuple[int, int], content: str):
+        with self._lock:
+            self._cache[full_path] = (key, content)
+            self._cache.move_to_end(full_path)
+            if len(self._cache) > READ_CACHE_SIZE:
+                self._cache.popitem(last=False)
+
+    def invalidate_listings(self):
+        with self._lock:
+            self._generation += 1
+
+    @property
+    def generation(self) -> int:
+        # Bumped by every write through this manager and by invalidate_listings.
+        return self._generation
 
     def list_files(self, pattern: str = "*") -> List[str]:
-        files = []
-        for path in self.root_path.rglob(pattern):
-            if not path.is_file():
-                continue
-            rel_path = path.relative_to(self.root_path)
-            if self._should_ignore(rel_path):
+        now = time.monotonic()
+        with self._lock:
+            cached = self._listings.get(pattern)
+            if (
+                cached is not None
+                and cached[0] == self._generation
+                and now - cached[1] < LIST_CACHE_TTL
+            ):
+                self._listings.move_to_end(pattern)
+                return list(cached[2])
+
+        generation = self._generation
+        files = self._walk(pattern)
+        with self._lock:
+            self._listings[pattern] = (generation, now, files)
+            self._listings.move_to_end(pattern)
+            if len(self._listings) > LIST_CACHE_SIZE:
+                self._listings.popitem(last=False)
+        return list(files)
+
+    def _walk(self, pattern: str) -> List[str]:
+        root = self._root
+        nested = "/" in pattern
+        files: List[str] = []
+        stack = [root]
+        while stack and len(files) < MAX_FILES:
+            directory = stack.pop()
+            try:
+                entries = os.scandir(directory)
+            except OSError:
                 continue
-            files.append(str(rel_path))
-            if len(files) >= MAX_FILES:
-                break
+            with entries:
+                for entry in entries:
+                    if _should_ignore(entry.name):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                        continue
+                    if not entry.is_file():
+                        continue
+                    if not nested and not fnmatchcase(entry.name, pattern):
+                        continue
+                    rel_path = os.path.relpath(entry.path, root)
+                    if os.sep != "/":
+                        rel_path = rel_path.replace(os.sep, "/")
+                    if nested and not _glob_match(rel_path, pattern):
+                        continue
+                    files.append(rel_path)
+                    if len(files) >= MAX_FILES:
+                        break
         return sorted(files)
 
-    def _should_ignore(self, rel_path: Path) -> bool:
-        parts = rel_path.parts
-        for part in parts:
-            if part in IGNORED_DIRS:
-                return True
-            if part.startswith(".") and part not in {".env", ".gitignore"}:
-                return True
-        return False
-
     def apply_edit(self, filepath: str, search: str, replace: str) -> bool:
-        try:
-            content = self.read_file(filepath)
+        return self.apply_edits([(filepath, search, replace)])[0]
 
-            if search in content:
-                new_content = content.replace(search, replace, 1)
-                self.write_file(filepath, new_content)
-                return True
+    def apply_edits(self, edits: List[Tuple[str, str, str]]) -> List[bool]:
+        results = [False] * len(edits)
+        by_file: Dict[str, List[int]] = {}
+        for index, (filepath, _, _) in enumerate(edits):
+            by_file.setdefault(filepath, []).append(index)
 
-            new_content = self._fuzzy_replace(content, search, replace)
-            if new_content:
-                self.write_file(filepath, new_content)
-                return True
+        def apply_file(filepath: str) -> None:
+            try:
+                content = self.read_file(filepath)
+                indices = by_file[filepath]
+                spliced = _splice_exact(content, [edits[index][1:] for index in indices])
+                if spliced is not None:
+                    self.write_file(filepath, spliced)
+                    for index in indices:
+                        results[index] = True
+                    return
 
-            return False
+                applied = []
+                for index in indices:
+                    _, search, replace = edits[index]
+                    new_content = self._replace_once(content, search, replace)
+                    if new_content is not None:
+                        content = new_content
+                        applied.append(index)
 
-        except Exception as e:
-            print(f"Error applying edit: {e}")
-            return False
+                if applied:
+                    self.write_file(filepath, content)
+                    for index in applied:
+                        results[index] = True
+
+            except Exception as e:
+                print(f"Error applying edit: {e}")
+
+        # Each file is read, patched and written by one worker, in edit order.
+        if len(by_file) == 1:
+            apply_file(next(iter(by_file)))
+        elif by_file:
+            with ThreadPoolExecutor(max_workers=min(EDIT_WORKERS, len(by_file))) as pool:
+                list(pool.map(apply_file, by_file))
+
+        return results
+
+    def _replace_once(self, content: str, search: str, replace: str) -> Optional[str]:
+        if search in content:
+            return content.replace(search, replace, 1)
+        new_content = self._fuzzy_replace(content, search, replace)
+        if new_content is not None:
+            return new_content
+        return self._approximate_replace(content, search, replace)
 
     def _fuzzy_replace(self, content: str, search: str, replace: str) -> Optional[str]:
-        def normalize(text):
-            return " ".join(text.split())
+        # Matching modulo whitespace runs: the search tokens joined by \s+ match
+        # exactly where " ".join(search.split()) occurs in the normalized content.
+        tokens = search.split()
+        if not tokens:
+            return None
+
+        match = re.search(r"\s+".join(map(re.escape, tokens)), content)
+        if match is None:
+            return None
+
+        return content[: match.start()] + replace + content[match.end() :]
+
+    def _approximate_replace(
+        self, content: str, search: str, replace: str
+    ) -> Optional[str]:
+        try:
+            from rapidfuzz import fuzz, process
+        except ImportError:
+            return None
 
-        search_norm = normalize(search)
-        content_norm = normalize(content)
+        width = len(search.splitlines())
+        lines = content.splitlines(keepends=True)
+        if width == 0 or width > len(lines):
+            return None
 
-        search_start = content_norm.find(search_norm)
-        if search_start == -1:
+        target = " ".join(search.split())
+        # Every line but the last ends in "\n", so tokens never span lines and
+        # a window's normalized text is just its normalized lines joined.
+        normalized = [" ".join(line.split()) for line in lines]
+        windows = [
+            " ".join(filter(None, normalized[i : i + width]))
+            for i in range(len(lines) - width + 1)
+        ]
+        match = process.extractOne(
+            target, windows, scorer=fuzz.ratio, score_cutoff=FUZZY_MATCH_THRESHOLD
+        )
+        if match is None:
             return None
 
-        orig_pos = 0
-        norm_pos = 0
+        start = match[2]
+        end = start + width
+        if lines[end - 1].endswith("\n") and not replace.endswith("\n"):
+            replace += "\n"
+        return "".join(lines[:start]) + replace + "".join(lines[end:])
 
-        for i, char in enumerate(content):
-            if (
-                content_norm[norm_pos : norm_pos + len(search_norm)] == search_norm
-                and norm_pos == search_start
-            ):
-                start_pos = i
-                break
-            if not char.isspace():
-                norm_pos += 1
-        else:
+
+def _splice_exact(content: str, pairs: List[Tuple[str, str]]) -> Optional[str]:
+    # One splice instead of a full-string copy per edit. Only used when it is
+    # indistinguishable from applying the edits one at a time: every search
+    # text is found, the matches do not overlap, and no search text can be
+    # re-found in a replacement or in the result.
+    if len(pairs) < 2:
+        return None
+    spans = []
+    for search, replace in pairs:
+        start = content.find(search) if search else -1
+        if start < 0:
             return None
+        spans.append((start, start + len(search), replace))
+    spans.sort()
+    if any(prev[1] > cur[0] for prev, cur in zip(spans, spans[1:])):
+        return None
+    searches = [search for search, _ in pairs]
+    if any(search in replace for search in searches for _, replace in pairs):
+        return None
 
-        search_end = search_start + len(search_norm)
-        norm_pos = search_start
-        for i in range(start_pos, len(content)):
-            if norm_pos >= search_end:
-                end_pos = i
+    parts = []
+    position = 0
+    for start, end, replace in spans:
+        parts.append(content[position:start])
+        parts.append(replace)
+        position = end
+    parts.append(content[position:])
+    result = "".join(parts)
+    if any(search in result for search in searches):
+        return None
+    return result
+
+
+def _read_bytes(full_path: str, size: int) -> bytes:
+    # Raw fd reads: no buffered/text layers and no read-to-EOF probing.
+    fd = os.open(full_path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        chunks = []
+        while size > 0:
+            chunk = os.read(fd, size)
+            if not chunk:
                 break
-            if not content[i].isspace():
-                norm_pos += 1
-        else:
-            end_pos = len(content)
+            chunks.append(chunk)
+            size -= len(chunk)
+        return chunks[0] if len(chunks) == 1 else b"".join(chunks)
+    finally:
+        os.close(fd)
+
+
+def _normalize_newlines(text: str) -> str:
+    if "\r" in text:
+        return text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def _truncated(head: str, filepath: str, size: int) -> str:
+    return (
+        f"{head}\n...[truncated: {filepath} is {size} bytes; "
+        f"use read_file with offset/limit for the rest]..."
+    )
+
+
+def _line_span(buffer, newline, offset: int, limit: Optional[int]) -> Tuple[int, int]:
+    # Works on str, bytes and mmap alike: all support find(sub, start).
+    size = len(buffer)
+    start = 0
+    for _ in range(max(offset, 1) - 1):
+        index = buffer.find(newline, start)
+        if index < 0:
+            return size, size
+        start = index + 1
+    if limit is None:
+        return start, size
+    end = start
+    for _ in range(max(limit, 0)):
+        index = buffer.find(newline, end)
+        if index < 0:
+            return start, size
+        end = index + 1
+    return start, end
+
+
+def _should_ignore(name: str) -> bool:
+    if name in IGNORED_DIRS:
+        return True
+    return name.startswith(".") and name not in {".env", ".gitignore"}
+
+
+def _match_parts(parts: List[str], pattern_parts: List[str]) -> bool:
+    if not pattern_parts:
+        return not parts
+    head = pattern_parts[0]
+    if head == "**":
+        return any(
+            _match_parts(parts[i:], pattern_parts[1:]) for i in range(len(parts) + 1)
+        )
+    return (
+        bool(parts)
+        and fnmatchcase(parts[0], head)
+        and _match_parts(parts[1:], pattern_parts[1:])
+    )
+
 
-        return content[:start_pos] + replace + content[end_pos:]
+def _glob_match(rel_path: str, pattern: str) -> bool:
+    # Path.rglob semantics: the pattern may match at any depth below the root.
+    parts = rel_path.split("/")
+    pattern_parts = pattern.split("/")
+    return any(_match_parts(parts[i:], pattern_parts) for i in range(len(parts)))
@@ -1,28 +1,107 @@
 import subprocess
+import threading
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
-from typing import List, Tuple
+from typing import Iterator, List, Optional, Tuple
+
+try:  # Optional: status/diff in-process via libgit2 instead of spawning git
+    import pygit2
+except ImportError:
+    pygit2 = None
+
+
+@lru_cache(maxsize=64)
+def _validate_repo(root_path: str) -> Path:
+    result = subprocess.run(
+        ["git", "rev-parse", "--git-dir"],
+        cwd=root_path,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return Path(root_path) / result.stdout.strip()
+
+
+def _open_repository(root_path: Path):
+    if pygit2 is None:
+        return None
+    try:
+        repo = pygit2.Repository(str(root_path))
+    except (pygit2.GitError, KeyError, ValueError):
+        return None
+    # Paths from libgit2 are relative to the work tree; only use it when that
+    # matches what `git` run from root_path would print.
+    if not repo.workdir or Path(repo.workdir).resolve() != root_path.resolve():
+        return None
+    return repo
+
+
+def _short_status(flags: int) -> str:
+    if flags & pygit2.GIT_STATUS_CONFLICTED:
+        return "UU"
+    if flags & pygit2.GIT_STATUS_WT_NEW and not flags & _INDEX_FLAGS:
+        return "??"
+    index = next((code for flag, code in _INDEX_CODES if flags & flag), " ")
+    worktree = next((code for flag, code in _WORKTREE_CODES if flags & flag), " ")
+    return index + worktree
+
+
+if pygit2 is not None:
+    _INDEX_CODES = (
+        (pygit2.GIT_STATUS_INDEX_NEW, "A"),
+        (pygit2.GIT_STATUS_INDEX_MODIFIED, "M"),
+        (pygit2.GIT_STATUS_INDEX_DELETED, "D"),
+        (pygit2.GIT_STATUS_INDEX_RENAMED, "R"),
+        (pygit2.GIT_STATUS_INDEX_TYPECHANGE, "T"),
+    )
+    _WORKTREE_CODES = (
+        (pygit2.GIT_STATUS_WT_MODIFIED, "M"),
+        (pygit2.GIT_STATUS_WT_DELETED, "D"),
+        (pygit2.GIT_STATUS_WT_RENAMED, "R"),
+        (pygit2.GIT_STATUS_WT_TYPECHANGE, "T"),
+    )
+    _INDEX_FLAGS = sum(flag for flag, _ in _INDEX_CODES)
 
 
 class GitRepo:
     def __init__(self, root_path: str):
         self.root_path = Path(root_path)
-        self._ensure_git_repo()
+        self.git_dir = self._ensure_git_repo()
+        self._repo = _open_repository(self.root_path)
+        # libgit2 repository handles are not safe for concurrent use, and the
+        # git_status/git_diff tools run in parallel on the tool thread pool.
+        self._repo_lock = threading.Lock()
 
-    def _ensure_git_repo(self):
+    def _ensure_git_repo(self) -> Path:
         try:
-            subprocess.run(
-                ["git", "rev-parse", "--git-dir"],
-                cwd=self.root_path,
-                capture_output=True,
-                check=True,
-            )
+            return _validate_repo(str(self.root_path.resolve()))
         except subprocess.CalledProcessError:
             raise Exception("Not a git repository")
 
+    def state_key(self) -> Tuple[int, ...]:
+        # Changes when the index is rewritten or HEAD moves (the reflog gets
+        # a line for every commit, reset and checkout). Work-tree edits are
+        # not covered; callers pair this with their own write tracking.
+        key = []
+        for name in ("index", "HEAD", "logs/HEAD"):
+            try:
+                key.append((self.git_dir / name).stat().st_mtime_ns)
+            except OSError:
+                key.append(0)
+        return tuple(key)
+
     def commit(self, message: str, files: List[str]) -> Tuple[str, str]:
         try:
-            for file in files:
-                subprocess.run(["git", "add", file], cwd=self.root_path, check=True)
+            if files:
+                subprocess.run(
+                    ["git", "add", "--", *files],
+                    cwd=self.root_path,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.PIPE,
+                    text=True,
+                    check=True,
+                )
 
             subprocess.run(
                 ["git", "commit", "-m", message],
@@ -45,15 +124,126 @@ class GitRepo:
         except subprocess.CalledProcessError as e:
             raise Exception(f"Git commit failed: {e.stderr}")
 
-    def get_diff(self) -> str:
-        result = subprocess.run(
-            ["git", "diff"], cwd=self.root_path, capture_output=True, text=True
+    def reset_soft(self, n: int = 1) -> None:
+        if self._repo is not None:
+            try:
+                with self._repo_lock:
+                    target = self._repo.revparse_single(f"HEAD~{n}")
+                    self._repo.reset(target.id, pygit2.GIT_RESET_SOFT)
+            except (pygit2.GitError, KeyError) as e:
+                raise Exception(f"Git reset failed: {e}")
+            return
+
+        try:
+            subprocess.run(
+                ["git", "reset", "--soft", f"HEAD~{n}"],
+                cwd=self.root_path,
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+        except subprocess.CalledProcessError as e:
+            raise Exception(f"Git reset failed: {e.stderr}")
+
+    def iter_diff(self) -> Iterator[str]:
+        if self._repo is not None:
+            with self._repo_lock:
+                diff = self._repo.diff()
+                count = len(diff)
+            # Patches are rendered one at a time so a truncated read stops early;
+            # the lock is not held while the caller consumes the lines.
+            for index in range(count):
+                with self._repo_lock:
+                    text = diff[index].text
+                yield from text.splitlines(keepends=True)
+            return
+
+        proc = subprocess.Popen(
+            ["git", "--no-optional-locks", "diff"],
+            cwd=self.root_path,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
         )
-        return result.stdout
+        try:
+            yield from proc.stdout
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+            proc.stdout.close()
+            proc.wait()
+
+    def get_diff(self, max_lines: Optional[int] = None) -> str:
+        lines = self.iter_diff()
+        try:
+            if max_lines is None:
+                return "".join(lines)
+            # One extra line tells a diff that exactly fits from a cut one.
+            head = list(islice(lines, max_lines + 1))
+        finally:
+            lines.close()
+        if len(head) <= max_lines:
+            return "".join(head)
+        return "".join(head[:max_lines]) + f"\n[diff truncated after {max_lines} lines]\n"
+
+    def is_dirty(self, include_untracked: bool = False) -> bool:
+        # Early-exit probes: skip the untracked-file walk (the slow part of
+        # `git status` in big trees) unless asked for.
+        if self._repo is not None:
+            with self._repo_lock:
+                status = self._repo.status(
+                    untracked_files="normal" if include_untracked else "no"
+                )
+            return any(not flags & pygit2.GIT_STATUS_IGNORED for flags in status.values())
+
+        for args in (["diff", "--quiet"], ["diff", "--cached", "--quiet"]):
+            result = subprocess.run(
+                ["git", "--no-optional-locks", *args],
+                cwd=self.root_path,
+                capture_output=True,
+            )
+            if result.returncode != 0:
+                return True
+        if not include_untracked:
+            return False
+        proc = subprocess.Popen(
+            ["git", "ls-files", "--others", "--exclude-standard"],
+            cwd=self.root_path,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        )
+        try:
+            return bool(proc.stdout.readline())
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+            proc.stdout.close()
+            proc.wait()
+
+    def get_status(self, include_untracked: bool = True) -> str:
+        if self._repo is not None:
+            with self._repo_lock:
+                status = self._repo.status(
+                    untracked_files="normal" if include_untracked else "no"
+                )
+            entries = [
+                (_short_status(flags), path)
+                for path, flags in sorted(status.items())
+                if not flags & pygit2.GIT_STATUS_IGNORED
+            ]
+            # Like `git status --short`: tracked changes first, then untracked.
+            entries.sort(key=lambda entry: entry[0] == "??")
+            return "".join(f"{code} {path}\n" for code, path in entries)
 
-    def get_status(self) -> str:
         result = subprocess.run(
-            ["git", "status", "--short"],
+            [
+                "git",
+                "--no-optional-locks",
+                "status",
+                "--short",
+                "--untracked-files=" + ("normal" if include_untracked else "no"),
+            ],
             cwd=self.root_path,
             capture_output=True,
             text=True,
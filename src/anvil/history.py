@@ -5,9 +5,14 @@ class MessageHistory:
     def __init__(self):
         self.messages: List[Dict[str, Any]] = []
         self.system_prompt: Optional[str] = None
+        self._api_messages: Optional[List[Dict[str, Any]]] = None
+        self._api_source: Optional[List[Dict[str, Any]]] = None
+        self._context_keys: List[Optional[str]] = []
+        self._context_source: Optional[List[Dict[str, Any]]] = None
 
     def set_system_prompt(self, prompt: str):
         self.system_prompt = prompt
+        self._api_messages = None
 
     def add_example_messages(self, examples: List[Dict[str, Any]]):
         self.messages = list(examples) + self.messages
@@ -15,6 +20,44 @@ class MessageHistory:
     def add_user_message(self, content: str):
         self.messages.append({"role": "user", "content": content})
 
+    def add_context_message(self, content: str, key: Optional[str] = None):
+        # Context blobs stay directly after the system prompt so the request
+        # prefix is identical across turns and can be cached by the provider.
+        # A keyed blob (e.g. a file) has one slot that re-adding overwrites.
+        keys = self._live_context_keys()
+        message = {"role": "user", "content": content}
+        if key is not None and key in keys:
+            self.messages[keys.index(key)] = message
+        else:
+            self.messages.insert(len(keys), message)
+            keys.append(key)
+        self._api_messages = None
+
+    def has_context_message(self, key: str) -> bool:
+        return key in self._live_context_keys()
+
+    def remove_context_message(self, key: str) -> bool:
+        keys = self._live_context_keys()
+        if key not in keys:
+            return False
+        idx = keys.index(key)
+        del self.messages[idx]
+        del keys[idx]
+        self._api_messages = None
+        return True
+
+    @property
+    def context_message_count(self) -> int:
+        if self._context_source is not self.messages:
+            return 0
+        return len(self._context_keys)
+
+    def _live_context_keys(self) -> List[Optional[str]]:
+        if self._context_source is not self.messages:
+            self._context_keys = []
+            self._context_source = self.messages
+        return self._context_keys
+
     def add_assistant_message(
         self, content: Optional[str] = None, tool_calls: Optional[List[Dict]] = None
     ):
@@ -38,16 +81,71 @@ class MessageHistory:
             }
         )
 
+    def estimated_tokens(self) -> int:
+        total = _estimate_tokens(self.system_prompt or "")
+        return total + sum(_estimate_message_tokens(m) for m in self.messages)
+
+    def drop_oldest_turns(self, budget_tokens: int, keep_turns: int = 2) -> int:
+        # Whole turns (a user message and everything up to the next one) go,
+        # oldest first, so tool calls never lose their results. Pinned context
+        # and the most recent turns are always kept.
+        total = self.estimated_tokens()
+        if total <= budget_tokens:
+            return 0
+        starts = [
+            idx
+            for idx in range(self.context_message_count, len(self.messages))
+            if self.messages[idx].get("role") == "user"
+        ]
+        if len(starts) <= keep_turns:
+            return 0
+        first = starts[0]
+        end = first
+        for start, next_start in zip(starts, starts[1 : len(starts) - keep_turns + 1]):
+            if total <= budget_tokens:
+                break
+            total -= sum(_estimate_message_tokens(m) for m in self.messages[start:next_start])
+            end = next_start
+        del self.messages[first:end]
+        self._api_messages = None
+        return end - first
+
     def get_messages_for_api(self, system_reminder: Optional[str] = None) -> List[Dict[str, Any]]:
-        if self.system_prompt:
-            msgs = [{"role": "system", "content": self.system_prompt}] + self.messages
-        else:
-            msgs = list(self.messages)
-        
+        msgs = self._sync_api_messages()
         if system_reminder:
-            msgs.append({"role": "system", "content": system_reminder})
-        
+            return msgs + [{"role": "system", "content": system_reminder}]
         return msgs
 
+    def _sync_api_messages(self) -> List[Dict[str, Any]]:
+        # The API view is cached and extended in place while `messages` only
+        # grows; replacing or shrinking `messages` triggers a rebuild.
+        source = self.messages
+        cached = self._api_messages
+        offset = 1 if self.system_prompt else 0
+        if (
+            cached is None
+            or self._api_source is not source
+            or len(cached) - offset > len(source)
+        ):
+            cached = [{"role": "system", "content": self.system_prompt}] if offset else []
+            cached.extend(source)
+            self._api_messages = cached
+            self._api_source = source
+        elif len(cached) - offset < len(source):
+            cached.extend(source[len(cached) - offset :])
+        return cached
+
     def clear(self):
         self.messages = []
+
+
+def _estimate_tokens(text: str) -> int:
+    # Rough chars/4 estimate; cheap enough to run before every request.
+    return len(text) // 4
+
+
+def _estimate_message_tokens(message: Dict[str, Any]) -> int:
+    tokens = _estimate_tokens(str(message.get("content") or ""))
+    if message.get("tool_calls"):
+        tokens += _estimate_tokens(str(message["tool_calls"]))
+    return tokens
@@ -19,19 +19,30 @@ class Linter:
         self.root = Path(root)
 
     def lint(self, filepath: str) -> LintResult | None:
-        full_path = self.root / filepath
-        if full_path.suffix != ".py":
-            return None
+        return self.lint_many([filepath]).get(filepath)
 
-        try:
-            code = full_path.read_text()
-        except OSError:
-            return None
+    def lint_many(self, filepaths: list[str]) -> dict[str, LintResult]:
+        # One flake8 process for all files: interpreter and plugin start-up
+        # dominate the cost of linting a handful of edited files.
+        compile_results: dict[str, LintResult | None] = {}
+        for filepath in dict.fromkeys(filepaths):
+            full_path = self.root / filepath
+            if full_path.suffix != ".py":
+                continue
+            try:
+                code = full_path.read_text()
+            except OSError:
+                continue
+            compile_results[filepath] = self._compile_check(code, filepath)
 
-        compile_result = self._compile_check(code, filepath)
-        flake8_result = self._flake8_check(filepath)
+        flake8_results = self._flake8_check(list(compile_results))
 
-        return self._merge_results(compile_result, flake8_result)
+        results: dict[str, LintResult] = {}
+        for filepath, compile_result in compile_results.items():
+            merged = self._merge_results(compile_result, flake8_results.get(filepath))
+            if merged:
+                results[filepath] = merged
+        return results
 
     def _compile_check(self, code: str, filepath: str) -> LintResult | None:
         try:
@@ -42,7 +53,9 @@ class Linter:
             tb = traceback.format_exception(type(err), err, None)
             return LintResult(text="".join(tb), lines=lines)
 
-    def _flake8_check(self, filepath: str) -> LintResult | None:
+    def _flake8_check(self, filepaths: list[str]) -> dict[str, LintResult]:
+        if not filepaths:
+            return {}
         cmd = [
             sys.executable,
             "-m",
@@ -50,21 +63,34 @@ class Linter:
             f"--select={self.FATAL_FLAKE8_CODES}",
             "--show-source",
             "--isolated",
-            filepath,
+            *filepaths,
         ]
         try:
             result = subprocess.run(
                 cmd, capture_output=True, text=True, cwd=self.root, timeout=30
             )
             if result.returncode == 0:
-                return None
+                return {}
             errors = result.stdout + result.stderr
             if "No module named flake8" in errors:
-                return None
-            lines = self._extract_line_numbers(errors, filepath)
-            return LintResult(text=errors, lines=lines)
+                return {}
         except (subprocess.TimeoutExpired, FileNotFoundError):
-            return None
+            return {}
+
+        # Each report starts with "path:line:col:"; --show-source lines that
+        # follow belong to the same file.
+        by_file: dict[str, list[str]] = {}
+        current = None
+        for line in errors.splitlines(keepends=True):
+            current = next((fp for fp in filepaths if line.startswith(f"{fp}:")), current)
+            if current is not None:
+                by_file.setdefault(current, []).append(line)
+        return {
+            filepath: LintResult(
+                text="".join(lines), lines=self._extract_line_numbers("".join(lines), filepath)
+            )
+            for filepath, lines in by_file.items()
+        }
 
     def _extract_line_numbers(self, text: str, filepath: str) -> list[int]:
         pattern = rf"{re.escape(filepath)}:(\d+)"
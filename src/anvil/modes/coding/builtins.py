@@ -6,7 +6,12 @@ def extend_coding_builtins(builtins, runtime) -> None:
         return True
 
     def cmd_git(args: str) -> bool:
-        if args == "status":
+        if not args:
+            if ext.git.is_dirty():
+                print("Uncommitted changes (/git status or /git diff for details)")
+            else:
+                print("No uncommitted changes to tracked files")
+        elif args == "status":
             print(ext.git.get_status() or "Nothing to commit")
         elif args == "diff":
             print(ext.git.get_diff() or "No changes")
@@ -1,5 +1,3 @@
-import subprocess
-
 from anvil.git import GitRepo
 from anvil.linter import Linter
 from anvil.parser import ResponseParser
@@ -31,24 +29,28 @@ class CodingExtension:
     def _apply_edits(self, edits: list[tuple[str, str, str]]) -> None:
         print(f"\n📝 Applying {len(edits)} edit(s)...")
 
-        edited_files: list[str] = []
-        for filename, search, replace in edits:
-            print(f"  Editing {filename}...")
-            if self.runtime.config.dry_run:
+        if self.runtime.config.dry_run:
+            for filename, _, _ in edits:
+                print(f"  Editing {filename}...")
                 print(f"    [DRY RUN] Would edit {filename}")
-                continue
+            return
 
-            success = self.runtime.files.apply_edit(filename, search, replace)
+        results = self.runtime.files.apply_edits(edits)
+
+        edited_files: list[str] = []
+        for (filename, _, _), success in zip(edits, results):
+            print(f"  Editing {filename}...")
             if success:
                 print(f"  ✅ {filename} updated")
-                edited_files.append(filename)
+                if filename not in edited_files:
+                    edited_files.append(filename)
             else:
                 print(f"  ❌ Failed to edit {filename}")
 
         if edited_files:
             self.runtime.hooks.fire_files_changed(edited_files, "apply_edits")
 
-        if edited_files and self.runtime.config.auto_commit and not self.runtime.config.dry_run:
+        if edited_files and self.runtime.config.auto_commit:
             self._auto_commit(edited_files)
 
     def _lint_and_fix(self) -> None:
@@ -66,11 +68,12 @@ class CodingExtension:
             last_errors: list[str] = []
 
             for attempt in range(retries):
-                errors: list[str] = []
-                for filepath in files_to_lint:
-                    result = self.linter.lint(filepath)
-                    if result:
-                        errors.append(f"## {filepath}\n{result.text}")
+                results = self.linter.lint_many(files_to_lint)
+                errors = [
+                    f"## {filepath}\n{results[filepath].text}"
+                    for filepath in files_to_lint
+                    if filepath in results
+                ]
 
                 if not errors:
                     return
@@ -103,13 +106,8 @@ class CodingExtension:
             print("❌ No recent commit to undo")
             return
         try:
-            subprocess.run(
-                ["git", "reset", "--soft", "HEAD~1"],
-                cwd=self.runtime.root_path,
-                check=True,
-                capture_output=True,
-            )
+            self.git.reset_soft()
             print(f"✅ Reverted commit {self.last_commit_hash[:8]}")
             self.last_commit_hash = None
-        except subprocess.CalledProcessError as e:
+        except Exception as e:
             print(f"❌ Failed to undo: {e}")
@@ -1,18 +1,59 @@
+import time
+
+MAX_DIFF_LINES = 2000
+
+# git_status/git_diff output is reused for this long unless something was
+# written through the runtime (files or run_command) or the index/HEAD moved;
+# same policy as FileManager's listing cache.
+GIT_CACHE_TTL = 5.0
+
+
 def register_coding_tools(tools, runtime) -> None:
     ext = runtime.extensions["coding"]
+    cache: dict[str, tuple[tuple, float, str]] = {}
+
+    def cached(name: str, compute) -> str:
+        key = (runtime.files.generation, ext.git.state_key())
+        now = time.monotonic()
+        hit = cache.get(name)
+        if hit is not None and hit[0] == key and now - hit[1] < GIT_CACHE_TTL:
+            return hit[2]
+        value = compute()
+        cache[name] = (key, now, value)
+        return value
+
+    def tool_git_status(include_untracked: bool = True) -> str:
+        return cached(
+            f"status:{include_untracked}",
+            lambda: ext.git.get_status(include_untracked=include_untracked)
+            or "Nothing to commit",
+        )
 
     tools.register_tool(
         name="git_status",
         description="Get the current git status",
-        parameters={"type": "object", "properties": {}, "required": []},
-        implementation=lambda: ext.git.get_status() or "Nothing to commit",
+        parameters={
+            "type": "object",
+            "properties": {
+                "include_untracked": {
+                    "type": "boolean",
+                    "description": "List untracked files (default true; false is faster in large trees)",
+                },
+            },
+            "required": [],
+        },
+        implementation=tool_git_status,
+        parallel_safe=True,
     )
 
     tools.register_tool(
         name="git_diff",
         description="Get the current git diff",
         parameters={"type": "object", "properties": {}, "required": []},
-        implementation=lambda: ext.git.get_diff() or "No changes",
+        implementation=lambda: cached(
+            "diff", lambda: ext.git.get_diff(max_lines=MAX_DIFF_LINES) or "No changes"
+        ),
+        parallel_safe=True,
     )
 
     def tool_apply_edit(filepath: str, search: str, replace: str) -> str:
@@ -0,0 +1,44 @@
+import ast
+
+# Python files larger than this are added to context as an outline; the model
+# reads bodies on demand with read_file(offset, limit).
+OUTLINE_MIN_CHARS = 20_000
+
+
+def python_outline(source: str) -> str | None:
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return None
+
+    lines: list[str] = []
+    _outline_body(tree.body, 0, lines, top_level=True)
+    return "\n".join(lines)
+
+
+def _outline_body(body: list[ast.stmt], depth: int, lines: list[str], top_level: bool = False):
+    indent = "    " * depth
+    for node in body:
+        if isinstance(node, ast.ClassDef):
+            bases = [ast.unparse(base) for base in node.bases]
+            bases += [ast.unparse(keyword) for keyword in node.keywords]
+            header = f"class {node.name}({', '.join(bases)}):" if bases else f"class {node.name}:"
+            lines.append(f"{indent}{header}  # L{_start(node)}-{node.end_lineno}")
+            _outline_body(node.body, depth + 1, lines)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+            returns = f" -> {ast.unparse(node.returns)}" if node.returns else ""
+            lines.append(
+                f"{indent}{prefix} {node.name}({ast.unparse(node.args)}){returns}: ..."
+                f"  # L{_start(node)}-{node.end_lineno}"
+            )
+        elif top_level and isinstance(node, (ast.Assign, ast.AnnAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            names = ", ".join(ast.unparse(target) for target in targets)
+            lines.append(f"{names} = ...  # L{node.lineno}")
+
+
+def _start(node: ast.FunctionDef | ast.AsyncFunctionDef | ast.ClassDef) -> int:
+    if node.decorator_list:
+        return node.decorator_list[0].lineno
+    return node.lineno
@@ -1,27 +1,90 @@
 import re
-from typing import List, Tuple
+from typing import List, Optional, Tuple
+
+
+_SEARCH_MARKER = "<<<<<<<"
+_DIVIDER = "======="
+_REPLACE_MARKER = ">>>>>>>"
+_FENCE = "```"
+_FILENAME_PATTERN = re.compile(r"[\w\-./]+\.\w+")
+
+
+def _is_filename_char(char: str) -> bool:
+    return char.isalnum() or char in "_-./"
+
+
+def _skip_keyword(text: str, pos: int, keyword: str) -> int:
+    while pos < len(text) and text[pos].isspace():
+        pos += 1
+    if not text.startswith(keyword, pos):
+        return -1
+    return pos + len(keyword)
+
+
+def _filename_before(text: str, marker: int) -> Optional[str]:
+    pos = marker
+    while pos > 0 and text[pos - 1].isspace():
+        pos -= 1
+    while pos > 0 and (text[pos - 1].isalnum() or text[pos - 1] == "_"):
+        pos -= 1
+    if not text.endswith(_FENCE, 0, pos):
+        return None
+    pos -= len(_FENCE)
+    while pos > 0 and text[pos - 1].isspace():
+        pos -= 1
+    end = pos
+    while pos > 0 and _is_filename_char(text[pos - 1]):
+        pos -= 1
+    filename = text[pos:end]
+    if not _FILENAME_PATTERN.fullmatch(filename):
+        return None
+    return filename
+
+
+def _find_block_end(text: str, pos: int) -> Tuple[int, int]:
+    while True:
+        marker = text.find(_REPLACE_MARKER, pos)
+        if marker == -1:
+            return -1, -1
+        pos = marker + len(_REPLACE_MARKER)
+        after_keyword = _skip_keyword(text, pos, "REPLACE")
+        if after_keyword == -1:
+            continue
+        fence = _skip_keyword(text, after_keyword, _FENCE)
+        if fence != -1:
+            return marker, fence
 
 
 class ResponseParser:
     @staticmethod
     def parse_edits(response: str) -> List[Tuple[str, str, str]]:
         edits = []
+        pos = 0
+
+        while True:
+            marker = response.find(_SEARCH_MARKER, pos)
+            if marker == -1:
+                break
+            pos = marker + len(_SEARCH_MARKER)
+
+            search_start = _skip_keyword(response, pos, "SEARCH")
+            if search_start == -1:
+                continue
+            filename = _filename_before(response, marker)
+            if filename is None:
+                continue
+
+            divider = response.find(_DIVIDER, search_start)
+            if divider == -1:
+                break
+            replace_start = divider + len(_DIVIDER)
+            replace_end, block_end = _find_block_end(response, replace_start)
+            if replace_end == -1:
+                break
 
-        pattern = r"""
-            (?P<filename>[\w\-./]+\.\w+)\s*
-            ```(?:\w+)?\s*
-            <<<<<<< \s* SEARCH\s*
-            (?P<search>.*?)
-            =======\s*
-            (?P<replace>.*?)
-            >>>>>>> \s* REPLACE\s*
-            ```
-        """
-
-        for match in re.finditer(pattern, response, re.DOTALL | re.VERBOSE):
-            filename = match.group("filename")
-            search = match.group("search").strip()
-            replace = match.group("replace").strip()
+            search = response[search_start:divider].strip()
+            replace = response[replace_start:replace_end].strip()
             edits.append((filename, search, replace))
+            pos = block_end
 
         return edits
@@ -1,4 +1,5 @@
 import os
+from functools import lru_cache
 from pathlib import Path
 from typing import Callable, Dict
 
@@ -20,9 +21,12 @@ def load_prompt_blocks(
 
     def find_block(relative_path: str) -> str:
         for directory in prompt_block_dirs:
-            path = directory / relative_path
-            if path.exists():
-                return path.read_text(encoding="utf-8")
+            path = os.path.join(directory, relative_path)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            return _read_block(path, st.st_mtime_ns, st.st_size)
         return ""
 
     def get_tool_description(tool_name: str) -> str:
@@ -39,6 +43,13 @@ def load_prompt_blocks(
     }
 
 
+@lru_cache(maxsize=256)
+def _read_block(path: str, mtime_ns: int, size: int) -> str:
+    # Shared by every runtime (and subagent) in the process; edited blocks
+    # are re-read because the key includes mtime and size.
+    return Path(path).read_text(encoding="utf-8")
+
+
 def build_main_system_prompt(
     root_path: str | Path,
     tool_names: list[str],
@@ -4,6 +4,9 @@ from anvil.config import resolve_model_alias
 class BuiltinCommands:
     def __init__(self, runtime):
         self.runtime = runtime
+        self._token_encoder = None
+        self._msg_tokens: list[int] = []
+        self._token_source = None
         self._handlers = {
             "quit": self.cmd_quit,
             "exit": self.cmd_quit,
@@ -56,7 +59,8 @@ class BuiltinCommands:
             print("Usage: /drop <filepath>")
             return True
         if args in self.runtime.files_in_context:
-            self.runtime.files_in_context.remove(args)
+            del self.runtime.files_in_context[args]
+            self.runtime.history.remove_context_message(args)
             print(f"✅ Dropped {args} from context")
         else:
             print(f"❌ {args} not in context")
@@ -73,6 +77,7 @@ class BuiltinCommands:
 
     def cmd_clear(self, args: str) -> bool:
         self.runtime.history.clear()
+        self._reset_token_counts()
         self.runtime.files_in_context.clear()
         self.runtime._set_system_prompt()
         print("✅ Cleared chat history and context")
@@ -95,11 +100,11 @@ class BuiltinCommands:
 
     def cmd_tokens(self, args: str) -> bool:
         try:
-            import tiktoken
+            if self._token_encoder is None:
+                import tiktoken
 
-            enc = tiktoken.encoding_for_model("gpt-4o")
-            messages = self.runtime.history.get_messages_for_api()
-            total = sum(len(enc.encode(str(m.get("content", "")))) for m in messages)
+                self._token_encoder = tiktoken.encoding_for_model("gpt-4o")
+            total = sum(self._count_message_tokens())
             print(f"📊 Estimated tokens: ~{total:,}")
         except ImportError:
             msg_count = len(self.runtime.history.messages)
@@ -108,6 +113,23 @@ class BuiltinCommands:
             )
         return True
 
+    def _count_message_tokens(self) -> list[int]:
+        # The history's API view is extended in place while messages are only
+        # appended and rebuilt otherwise, so only the new tail needs encoding.
+        messages = self.runtime.history.get_messages_for_api()
+        if messages is not self._token_source or len(self._msg_tokens) > len(messages):
+            self._reset_token_counts()
+            self._token_source = messages
+        new = messages[len(self._msg_tokens) :]
+        if new:
+            texts = [str(m.get("content", "")) for m in new]
+            self._msg_tokens.extend(map(len, self._token_encoder.encode_batch(texts)))
+        return self._msg_tokens
+
+    def _reset_token_counts(self) -> None:
+        self._msg_tokens = []
+        self._token_source = None
+
     def cmd_commands(self, args: str) -> bool:
         if not self.runtime.markdown_index.commands:
             print("No markdown commands found")
@@ -160,6 +182,7 @@ class BuiltinCommands:
             print(f"❌ Session {args} not found")
             return True
         self.runtime.history.messages = list(session.messages)
+        self._reset_token_counts()
         print(f"✅ Loaded session {args}")
         return True
 
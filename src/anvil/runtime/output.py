@@ -0,0 +1,32 @@
+import sys
+import time
+from typing import TextIO
+
+# Streamed deltas are flushed in batches: a flush per token is a write()
+# syscall per token, which dominates on slow terminals and over SSH.
+STREAM_FLUSH_CHARS = 64
+STREAM_FLUSH_INTERVAL = 0.05
+
+
+class StreamWriter:
+    def __init__(self, stream: TextIO | None = None):
+        self._stream = stream
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def write(self, text: str) -> None:
+        stream = self._stream or sys.stdout
+        stream.write(text)
+        self._pending += len(text)
+        now = time.monotonic()
+        if (
+            self._pending >= STREAM_FLUSH_CHARS
+            or text.endswith("\n")
+            or now - self._last_flush >= STREAM_FLUSH_INTERVAL
+        ):
+            self.flush(now)
+
+    def flush(self, now: float | None = None) -> None:
+        (self._stream or sys.stdout).flush()
+        self._pending = 0
+        self._last_flush = time.monotonic() if now is None else now
@@ -1,3 +1,5 @@
+import traceback
+
 from anvil.runtime.builtins import BuiltinCommands
 from anvil.runtime.router import InputRouter
 
@@ -56,6 +58,4 @@ class AnvilREPL:
                 break
             except Exception as e:
                 print(f"\n❌ Error: {e}")
-                import traceback
-
                 traceback.print_exc()
@@ -1,12 +1,15 @@
 import hashlib
-import json
+import os
+import random
 import shutil
 import subprocess
+import traceback
 from pathlib import Path
 from typing import Any, Dict, List
 
-from common import llm
+from common import jsonio, llm
 from common.agent_loop import LoopConfig, run_loop
+from common.response_cache import ResponseCache
 from common.events import (
     AssistantDeltaEvent,
     AssistantMessageEvent,
@@ -16,8 +19,9 @@ from common.events import (
     ToolResultEvent,
 )
 from anvil.config import AgentConfig, resolve_model_alias
-from anvil.files import FileManager
+from anvil.files import MAX_READ_BYTES, FileManager
 from anvil.history import MessageHistory
+from anvil.outline import OUTLINE_MIN_CHARS, python_outline
 from anvil.shell import ShellRunner
 from anvil.tools import ToolRegistry
 from anvil.prompts import build_main_system_prompt, load_prompt_blocks
@@ -28,10 +32,17 @@ from anvil.subagents.registry import AgentRegistry
 from anvil.subagents.task_tool import SubagentRunner, TaskTool
 from anvil.modes.base import ModeConfig
 from anvil.runtime.hooks import RuntimeHooks
+from anvil.runtime.output import StreamWriter
 from anvil.tools.extract import WEB_EXTRACT_TOOL_SCHEMA, web_extract
 from anvil.tools.search import WEB_SEARCH_TOOL_SCHEMA, web_search
 
 
+HISTORY_BUDGET_RATIO = 0.8
+
+# Cap on the jittered exponential backoff after a rate-limit error.
+RATE_LIMIT_MAX_DELAY = 30.0
+
+
 class AnvilRuntime:
     def __init__(
         self,
@@ -52,9 +63,14 @@ class AnvilRuntime:
         self.shell = ShellRunner(str(root_path))
         self.tools = ToolRegistry()
 
-        self.files_in_context: List[str] = []
+        # Ordered set of paths (dict keys) for O(1) membership checks.
+        self.files_in_context: Dict[str, None] = {}
+        # filepath -> (mtime_ns, size, sha1) of the snapshot last put in context
+        self._context_signatures: Dict[str, tuple[int, int, str]] = {}
         self.interrupted = False
+        self.response_cache: ResponseCache | None = None
         self.hooks = RuntimeHooks()
+        self.hooks.on_files_changed.append(self._forget_context_signatures)
         self.extensions: dict[str, Any] = {}
 
         self.markdown_index = MarkdownIndex(self.root_path)
@@ -110,11 +126,20 @@ class AnvilRuntime:
                     "filepath": {
                         "type": "string",
                         "description": "Path to the file relative to repository root",
-                    }
+                    },
+                    "offset": {
+                        "type": "integer",
+                        "description": "Line number to start reading from (1-based)",
+                    },
+                    "limit": {
+                        "type": "integer",
+                        "description": "Number of lines to read",
+                    },
                 },
                 "required": ["filepath"],
             },
             implementation=self._tool_read_file,
+            parallel_safe=True,
         )
 
         self.tools.register_tool(
@@ -149,6 +174,7 @@ class AnvilRuntime:
                 "required": [],
             },
             implementation=self._tool_list_files,
+            parallel_safe=True,
         )
 
         self.tools.register_tool(
@@ -171,6 +197,7 @@ class AnvilRuntime:
                 "required": ["pattern"],
             },
             implementation=self._tool_grep,
+            parallel_safe=True,
         )
 
         self.tools.register_tool(
@@ -194,6 +221,7 @@ class AnvilRuntime:
             description="Search the web (Tavily)",
             parameters=WEB_SEARCH_TOOL_SCHEMA,
             implementation=self._tool_web_search,
+            parallel_safe=True,
         )
 
         self.tools.register_tool(
@@ -201,6 +229,7 @@ class AnvilRuntime:
             description="Extract raw page content (Tavily)",
             parameters=WEB_EXTRACT_TOOL_SCHEMA,
             implementation=self._tool_web_extract,
+            parallel_safe=True,
         )
 
         self.tools.register_tool(
@@ -214,6 +243,7 @@ class AnvilRuntime:
                 "required": ["name"],
             },
             implementation=self._tool_skill,
+            parallel_safe=True,
         )
 
     def _register_subagent_tools(self) -> None:
@@ -239,8 +269,14 @@ class AnvilRuntime:
             implementation=task_tool,
         )
 
-    def _tool_read_file(self, filepath: str) -> str:
-        return self.files.read_file(filepath)
+    def _tool_read_file(
+        self, filepath: str, offset: int | None = None, limit: int | None = None
+    ) -> str:
+        if offset is None and limit is None:
+            return self.files.read_file(filepath, max_bytes=MAX_READ_BYTES)
+        return self.files.read_lines(
+            filepath, int(offset or 1), None if limit is None else int(limit)
+        )
 
     def _tool_write_file(self, filepath: str, content: str) -> str:
         self.files.write_file(filepath, content)
@@ -282,6 +318,7 @@ class AnvilRuntime:
 
     def _tool_run_command(self, command: str) -> str:
         result = self.shell.run_command(command)
+        self.files.invalidate_listings()
 
         if result["success"]:
             return f"Exit code: {result['exit_code']}\n\nOutput:\n{result['stdout']}"
@@ -343,16 +380,63 @@ class AnvilRuntime:
             self.session_manager.system_prompt_version = self.system_prompt_version
 
     def add_file_to_context(self, filepath: str):
-        if filepath not in self.files_in_context:
-            self.files_in_context.append(filepath)
+        try:
+            st = os.stat(self.root_path / filepath)
+            previous = self._context_signatures.get(filepath)
+            in_history = self.history.has_context_message(filepath)
+            if in_history and previous and previous[:2] == (st.st_mtime_ns, st.st_size):
+                print(f"✅ {filepath} unchanged, already in context")
+                return
+
+            content = self.files.read_file(filepath)
+            digest = hashlib.sha1(content.encode("utf-8")).hexdigest()
+            self._context_signatures[filepath] = (st.st_mtime_ns, st.st_size, digest)
+            if in_history and previous and previous[2] == digest:
+                print(f"✅ {filepath} unchanged, already in context")
+                return
 
-            try:
-                content = self.files.read_file(filepath)
+            outline = None
+            if filepath.endswith(".py") and len(content) > OUTLINE_MIN_CHARS:
+                outline = python_outline(content)
+            if outline:
+                line_count = content.count("\n") + 1
+                context_msg = (
+                    f"=== {filepath} (outline of {line_count} lines; "
+                    f"use read_file with offset/limit for bodies) ===\n{outline}\n"
+                )
+            else:
                 context_msg = f"=== {filepath} ===\n{content}\n"
-                self.history.add_user_message(context_msg)
-                print(f"✅ Added {filepath} to context")
-            except Exception as e:
-                print(f"❌ Error adding {filepath}: {e}")
+            # Re-adding a file replaces its earlier snapshot instead of
+            # stacking another copy of it into the history.
+            self.history.add_context_message(context_msg, key=filepath)
+            suffix = " (outline)" if outline else ""
+            if filepath in self.files_in_context:
+                print(f"✅ Refreshed {filepath} in context{suffix}")
+            else:
+                self.files_in_context[filepath] = None
+                print(f"✅ Added {filepath} to context{suffix}")
+        except Exception as e:
+            print(f"❌ Error adding {filepath}: {e}")
+
+    def _history_token_budget(self) -> int:
+        if self.config.history_token_budget is not None:
+            return self.config.history_token_budget
+        info = llm.get_model_info(resolve_model_alias(self.config.model))
+        max_input = info.get("max_input_tokens") or 0
+        # Headroom for the reply and for the chars/4 estimate undercounting code.
+        return int(max_input * HISTORY_BUDGET_RATIO) - self.config.max_tokens if max_input else 0
+
+    def _fit_history_to_budget(self) -> None:
+        budget = self._history_token_budget()
+        if budget <= 0:
+            return
+        dropped = self.history.drop_oldest_turns(budget)
+        if dropped:
+            print(f"🧹 Dropped {dropped} old messages to fit the context budget")
+
+    def _forget_context_signatures(self, filepaths: List[str], source: str) -> None:
+        for filepath in filepaths:
+            self._context_signatures.pop(filepath, None)
 
     def process_user_message(self, message: str):
         self.history.add_user_message(message)
@@ -369,10 +453,12 @@ class AnvilRuntime:
             for filepath in files:
                 self.add_file_to_context(filepath)
         self.history.add_user_message(prompt)
+        self._fit_history_to_budget()
         result = run_loop(
             messages=self.history.messages,
             tools=self.tools.get_tool_schemas(),
             execute_tool=lambda name, args: self.tools.execute_tool(name, args),
+            execute_tools=self.tools.execute_tools,
             config=LoopConfig(
                 model=resolve_model_alias(self.config.model),
                 system_prompt=self.history.system_prompt,
@@ -381,7 +467,9 @@ class AnvilRuntime:
                 max_tokens=self.config.max_tokens,
                 stream=False,
                 use_tools=self.config.use_tools,
+                context_messages=self.history.context_message_count,
             ),
+            response_cache=self._get_response_cache(),
             emitter=None,
         )
         self.hooks.fire_turn_end()
@@ -391,8 +479,9 @@ class AnvilRuntime:
         self._send_to_llm_with_tools_internal()
         self.hooks.fire_turn_end()
 
-    def _send_to_llm_with_tools_internal(self):
+    def _send_to_llm_with_tools_internal(self, attempt: int = 0):
         started_response = False
+        writer = StreamWriter()
 
         def on_event(event) -> None:
             nonlocal started_response
@@ -404,9 +493,10 @@ class AnvilRuntime:
                 if not started_response:
                     print("\n🤖 Assistant:", end=" ")
                     started_response = True
-                print(event.text, end="", flush=True)
+                writer.write(event.text)
                 return
             if isinstance(event, AssistantMessageEvent):
+                writer.flush()
                 if self.config.stream and started_response:
                     print()
                 if event.content:
@@ -414,7 +504,10 @@ class AnvilRuntime:
                     self._autosave()
                 return
             if isinstance(event, ToolCallEvent):
-                print(f"\n🔧 Calling: {event.tool_name}({json.dumps(event.args, indent=2)})")
+                writer.flush()
+                # Compact, like the raw arguments the model sent: re-indenting a
+                # large write_file payload costs more than the call itself.
+                print(f"\n🔧 Calling: {event.tool_name}({jsonio.dumps(event.args)})")
                 return
             if isinstance(event, ToolResultEvent):
                 if event.result.get("success"):
@@ -425,12 +518,14 @@ class AnvilRuntime:
                 self._autosave()
                 return
 
+        self._fit_history_to_budget()
         max_iterations = 10
         try:
             run_loop(
                 messages=self.history.messages,
                 tools=self.tools.get_tool_schemas(),
                 execute_tool=lambda name, args: self.tools.execute_tool(name, args),
+                execute_tools=self.tools.execute_tools,
                 config=LoopConfig(
                     model=resolve_model_alias(self.config.model),
                     system_prompt=self.history.system_prompt,
@@ -439,89 +534,36 @@ class AnvilRuntime:
                     max_tokens=self.config.max_tokens,
                     stream=self.config.stream,
                     use_tools=self.config.use_tools,
+                    context_messages=self.history.context_message_count,
                 ),
+                response_cache=self._get_response_cache(),
                 emitter=EventEmitter(on_event),
             )
         except Exception as e:
-            error_str = str(e).lower()
-            if "rate" in error_str and "limit" in error_str:
-                print("❌ Rate limit hit. Waiting...")
-                import time
-
-                time.sleep(5)
-                return self._send_to_llm_with_tools_internal()
+            writer.flush()
+            if isinstance(e, llm.RateLimitError) and attempt < self.config.max_retries:
+                delay = llm.retry_after(e)
+                if delay is None:
+                    delay = 2**attempt + random.random()
+                delay = min(RATE_LIMIT_MAX_DELAY, delay)
+                print(f"❌ Rate limit hit. Retrying in {delay:.1f}s...")
+                # The next completion call (from any thread) waits this out.
+                llm.note_rate_limit(delay)
+                return self._send_to_llm_with_tools_internal(attempt + 1)
             print(f"\n❌ Error calling LLM: {e}")
-            import traceback
-
             traceback.print_exc()
 
-    def _handle_streaming_with_tools(self, api_kwargs: Dict) -> Any:
-        api_kwargs["stream"] = True
-        stream = llm.completion(**api_kwargs)
-
-        accumulated_content = ""
-        accumulated_tool_calls: Dict[int, Dict[str, Any]] = {}
-
-        print("\n🤖 Assistant:", end=" ")
-
-        for chunk in stream:
-            if self.interrupted:
-                break
-
-            delta = chunk.choices[0].delta
-
-            if hasattr(delta, "content") and delta.content:
-                content = delta.content
-                print(content, end="", flush=True)
-                accumulated_content += content
-
-            if hasattr(delta, "tool_calls") and delta.tool_calls:
-                for tc in delta.tool_calls:
-                    idx = tc.index
-
-                    if idx not in accumulated_tool_calls:
-                        accumulated_tool_calls[idx] = {
-                            "id": "",
-                            "type": "function",
-                            "function": {"name": "", "arguments": ""},
-                        }
-
-                    if tc.id:
-                        accumulated_tool_calls[idx]["id"] = tc.id
-                    if hasattr(tc, "function") and tc.function:
-                        if tc.function.name:
-                            accumulated_tool_calls[idx]["function"][
-                                "name"
-                            ] = tc.function.name
-                        if tc.function.arguments:
-                            accumulated_tool_calls[idx]["function"][
-                                "arguments"
-                            ] += tc.function.arguments
-
-        print()
-
-        class Response:
-            def __init__(self, content: str, tool_calls: Dict[int, Dict[str, Any]]):
-                self.content = content
-                self.tool_calls: List[Any] = []
-
-                for tc_data in tool_calls.values():
-
-                    class ToolCall:
-                        def __init__(self, data: Dict[str, Any]):
-                            self.id = data["id"]
-                            self.type = data["type"]
-
-                            class Function:
-                                def __init__(self, func_data: Dict[str, Any]):
-                                    self.name = func_data["name"]
-                                    self.arguments = func_data["arguments"]
-
-                            self.function = Function(data["function"])
-
-                    self.tool_calls.append(ToolCall(tc_data))
-
-        return Response(accumulated_content, accumulated_tool_calls)
+    def _get_response_cache(self) -> ResponseCache | None:
+        # run_loop only replays tool-free, temperature-0 requests; don't create
+        # the cache file for sessions that can never use it.
+        if not self.config.use_cache or self.config.use_tools or self.config.temperature:
+            return None
+        if self.response_cache is None:
+            self.response_cache = ResponseCache(
+                self.root_path / ".anvil" / "cache" / "responses.sqlite",
+                ttl=self.config.cache_ttl,
+            )
+        return self.response_cache
 
     def _autosave(self) -> None:
         if hasattr(self, "session_manager") and self.session_manager:
@@ -60,7 +60,9 @@ class SessionManager:
             self.current.messages = list(history.messages)
 
         path = self.sessions_dir / f"{self.current.metadata.id}.json"
-        atomic_write_json(path, self.current.model_dump())
+        # Compact: sessions are rewritten on every autosave and only read back
+        # by /load.
+        atomic_write_json(path, self.current.model_dump(), indent=False)
 
     def load_session(self, session_id: str) -> SessionState | None:
         primary = self.sessions_dir / f"{session_id}.json"
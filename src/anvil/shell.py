@@ -1,56 +1,269 @@
+import os
+import re
+import secrets
+import selectors
+import shlex
+import signal
 import subprocess
+import threading
+import time
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Set
+
+
+SAFE_COMMAND_PREFIXES = (
+    "ls",
+    "pwd",
+    "cat",
+    "head",
+    "tail",
+    "wc",
+    "git status",
+    "git diff",
+    "git log",
+    "git show",
+)
+
+# Options that let read-only git commands write files or run configured programs.
+UNSAFE_GIT_OPTIONS = ("-o", "--output", "--ext-diff", "--textconv")
+
+DESTRUCTIVE_COMMANDS: Set[str] = {
+    "rm",
+    "rmdir",
+    "sudo",
+    "dd",
+    "mkfs",
+    "chmod",
+    "chown",
+    "curl",
+    "wget",
+}
+
+DEFAULT_TIMEOUT = 30
+
+# Timeouts (seconds) by command prefix; the longest matching prefix wins.
+COMMAND_TIMEOUTS: Dict[str, int] = {
+    "ls": 10,
+    "pwd": 5,
+    "cat": 10,
+    "git status": 15,
+    "git diff": 15,
+    "pytest": 300,
+    "python -m pytest": 300,
+    "npm test": 300,
+    "npm install": 600,
+    "pip install": 600,
+    "uv sync": 600,
+    "make": 300,
+    "cargo build": 600,
+    "cargo test": 600,
+}
+
+# Run commands through one long-lived /bin/sh per runner instead of spawning
+# a shell per call. Each command still gets its own subshell, so cd/exports
+# and `exit` do not leak into later commands.
+PERSISTENT_SHELL = os.name == "posix"
+
+_SHELL_METACHARS = re.compile(r"[;&|<>`$\n]")
+_COMMAND_SPLIT = re.compile(r"[\s;&|()]+")
+
+
+def is_safe_command(command: str) -> bool:
+    if _SHELL_METACHARS.search(command):
+        return False
+    if not any(
+        command == prefix or command.startswith(prefix + " ")
+        for prefix in SAFE_COMMAND_PREFIXES
+    ):
+        return False
+    try:
+        words = shlex.split(command)
+    except ValueError:
+        return False
+    for word in words[1:]:
+        # Keep auto-approved reads inside the working tree.
+        if word.startswith(("/", "~")) or ".." in word.split("/"):
+            return False
+        if words[0] == "git" and word.startswith(UNSAFE_GIT_OPTIONS):
+            return False
+    return True
+
+
+def timeout_for(command: str) -> int:
+    matches = [
+        prefix
+        for prefix in COMMAND_TIMEOUTS
+        if command == prefix or command.startswith(prefix + " ")
+    ]
+    if not matches:
+        return DEFAULT_TIMEOUT
+    return COMMAND_TIMEOUTS[max(matches, key=len)]
+
+
+def is_destructive_command(command: str) -> bool:
+    return any(
+        os.path.basename(word) in DESTRUCTIVE_COMMANDS
+        for word in _COMMAND_SPLIT.split(command)
+    )
 
 
 class ShellRunner:
     def __init__(self, root_path: str, auto_approve: bool = False):
         self.root_path = Path(root_path)
         self.auto_approve = auto_approve
+        self._approved: Set[str] = set()
+        self._shell: Optional[PersistentShell] = None
+        self._shell_lock = threading.Lock()
+
+    def _needs_approval(self, command: str) -> bool:
+        if self.auto_approve:
+            return False
+        if is_destructive_command(command):
+            return True
+        return not is_safe_command(command) and command not in self._approved
 
-    def run_command(self, command: str) -> Dict[str, Any]:
-        if not self.auto_approve:
+    def run_command(self, command: str, timeout: Optional[int] = None) -> Dict[str, Any]:
+        command = command.strip()
+        if self._needs_approval(command):
             print(f"\n🔧 Command to run: {command}")
             response = input("Execute? (y/n): ")
             if response.lower() != "y":
-                return {
-                    "success": False,
-                    "error": "User cancelled",
-                    "stdout": "",
-                    "stderr": "",
-                    "exit_code": -1,
-                }
+                return _failure("User cancelled")
+            if not is_destructive_command(command):
+                self._approved.add(command)
+
+        timeout = timeout or timeout_for(command)
+        # Concurrent callers fall back to a one-off process rather than queue.
+        if PERSISTENT_SHELL and self._shell_lock.acquire(blocking=False):
+            try:
+                if self._shell is None or not self._shell.alive:
+                    self._shell = PersistentShell(self.root_path)
+                return self._shell.run(command, timeout)
+            except Exception as e:
+                return _failure(str(e))
+            finally:
+                self._shell_lock.release()
+        return self._spawn(command, timeout)
+
+    def close(self) -> None:
+        if self._shell is not None:
+            self._shell.close()
+            self._shell = None
 
+    def _spawn(self, command: str, timeout: int) -> Dict[str, Any]:
         try:
-            result = subprocess.run(
+            # Own session/process group so a timeout kills grandchildren too.
+            proc = subprocess.Popen(
                 command,
                 shell=True,
                 cwd=self.root_path,
-                capture_output=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
                 text=True,
-                timeout=30,
+                start_new_session=True,
             )
+            try:
+                stdout, stderr = proc.communicate(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                _kill_process_group(proc)
+                proc.communicate()
+                return _failure("Command timed out")
 
             return {
-                "success": result.returncode == 0,
-                "stdout": result.stdout,
-                "stderr": result.stderr,
-                "exit_code": result.returncode,
+                "success": proc.returncode == 0,
+                "stdout": stdout,
+                "stderr": stderr,
+                "exit_code": proc.returncode,
             }
 
-        except subprocess.TimeoutExpired:
-            return {
-                "success": False,
-                "error": "Command timed out",
-                "stdout": "",
-                "stderr": "",
-                "exit_code": -1,
-            }
         except Exception as e:
-            return {
-                "success": False,
-                "error": str(e),
-                "stdout": "",
-                "stderr": "",
-                "exit_code": -1,
-            }
+            return _failure(str(e))
+
+
+class PersistentShell:
+    def __init__(self, root_path: Path):
+        self.root_path = Path(root_path)
+        self._token = secrets.token_hex(8)
+        self._done = re.compile(rf"__ANVIL_{self._token}_(\d+)__\n$".encode())
+        self._stderr_done = f"__ANVIL_{self._token}__\n".encode()
+        self._proc = subprocess.Popen(
+            ["/bin/sh"],
+            cwd=self.root_path,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            start_new_session=True,
+        )
+
+    @property
+    def alive(self) -> bool:
+        return self._proc.poll() is None
+
+    def run(self, command: str, timeout: int) -> Dict[str, Any]:
+        root = shlex.quote(str(self.root_path))
+        script = (
+            f"(cd {root} && eval {shlex.quote(command)}) </dev/null\n"
+            f"printf '__ANVIL_{self._token}_%d__\\n' $?\n"
+            f"printf '__ANVIL_{self._token}__\\n' >&2\n"
+        )
+        stdout, stderr = bytearray(), bytearray()
+        deadline = time.monotonic() + timeout
+        try:
+            self._proc.stdin.write(script.encode("utf-8"))
+            self._proc.stdin.flush()
+            with selectors.DefaultSelector() as selector:
+                selector.register(self._proc.stdout, selectors.EVENT_READ, stdout)
+                selector.register(self._proc.stderr, selectors.EVENT_READ, stderr)
+                while True:
+                    out_done = None
+                    if stdout.endswith(b"__\n"):
+                        out_done = self._done.search(stdout, max(0, len(stdout) - 64))
+                    if out_done and stderr.endswith(self._stderr_done):
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.close()
+                        return _failure("Command timed out")
+                    for key, _ in selector.select(remaining):
+                        chunk = os.read(key.fd, 65536)
+                        if not chunk:
+                            self.close()
+                            return _failure("Shell exited unexpectedly")
+                        key.data.extend(chunk)
+        except BaseException:
+            # Interrupted mid-command (e.g. Ctrl-C): kill the shell so the
+            # abandoned command stops and its output never leaks into the next.
+            self.close()
+            raise
+
+        exit_code = int(out_done.group(1))
+        return {
+            "success": exit_code == 0,
+            "stdout": stdout[: out_done.start()].decode("utf-8", errors="replace"),
+            "stderr": stderr[: -len(self._stderr_done)].decode("utf-8", errors="replace"),
+            "exit_code": exit_code,
+        }
+
+    def close(self) -> None:
+        if self.alive:
+            _kill_process_group(self._proc)
+        self._proc.wait()
+        for pipe in (self._proc.stdin, self._proc.stdout, self._proc.stderr):
+            pipe.close()
+
+
+def _failure(error: str) -> Dict[str, Any]:
+    return {
+        "success": False,
+        "error": error,
+        "stdout": "",
+        "stderr": "",
+        "exit_code": -1,
+    }
+
+
+def _kill_process_group(proc: subprocess.Popen) -> None:
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except (AttributeError, ProcessLookupError, PermissionError):
+        proc.kill()
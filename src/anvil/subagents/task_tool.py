@@ -1,9 +1,9 @@
-import json
 import os
 from pathlib import Path
 import time
 from typing import Any, Dict
 
+from common import jsonio
 from common.text_template import render_template
 from anvil.history import MessageHistory
 from anvil.subagents.registry import AgentRegistry, AgentDefinition
@@ -126,7 +126,7 @@ class SubagentRunner:
 
                 for tool_call in tool_calls:
                     tool_name = tool_call.function.name
-                    tool_args = json.loads(tool_call.function.arguments)
+                    tool_args = jsonio.loads(tool_call.function.arguments)
                     dt_ms: int | None = None
                     executed = True
                     if allowed_tool_names is not None and tool_name not in allowed_tool_names:
@@ -181,7 +181,7 @@ class SubagentRunner:
                     history.add_tool_result(
                         tool_call_id=tool_call.id,
                         name=tool_name,
-                        result=json.dumps(result),
+                        result=jsonio.dumps(result),
                     )
 
                 messages = history.get_messages_for_api()
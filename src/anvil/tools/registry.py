@@ -1,10 +1,15 @@
-from typing import Dict, Any, Callable, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, List, Optional, Set, Tuple
+
+MAX_PARALLEL_TOOLS = 8
 
 
 class ToolRegistry:
     def __init__(self):
         self.tools: Dict[str, Dict[str, Any]] = {}
         self.implementations: Dict[str, Callable] = {}
+        self.parallel_safe: Set[str] = set()
+        self._schemas: Optional[List[Dict[str, Any]]] = None
 
     def register_tool(
         self,
@@ -12,6 +17,7 @@ class ToolRegistry:
         description: str,
         parameters: Dict[str, Any],
         implementation: Callable,
+        parallel_safe: bool = False,
     ):
         self.tools[name] = {
             "type": "function",
@@ -23,16 +29,36 @@ class ToolRegistry:
         }
 
         self.implementations[name] = implementation
+        if parallel_safe:
+            self.parallel_safe.add(name)
+        else:
+            self.parallel_safe.discard(name)
+        self._schemas = None
 
     def get_tool_schemas(self) -> List[Dict[str, Any]]:
-        return list(self.tools.values())
+        if self._schemas is None:
+            self._schemas = list(self.tools.values())
+        return self._schemas
 
     def execute_tool(self, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
-        if name not in self.implementations:
+        implementation = self.implementations.get(name)
+        if implementation is None:
             return {"error": f"Tool {name} not found"}
 
         try:
-            result = self.implementations[name](**arguments)
+            result = implementation(**arguments)
             return {"success": True, "result": result}
         except Exception as e:
             return {"success": False, "error": str(e)}
+
+    def execute_tools(
+        self,
+        calls: List[Tuple[str, Dict[str, Any]]],
+        max_workers: int = MAX_PARALLEL_TOOLS,
+    ) -> List[Dict[str, Any]]:
+        """Run calls in order; batches of only parallel-safe tools run concurrently."""
+        if len(calls) < 2 or any(name not in self.parallel_safe for name, _ in calls):
+            return [self.execute_tool(name, arguments) for name, arguments in calls]
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(calls))) as pool:
+            return list(pool.map(lambda call: self.execute_tool(*call), calls))
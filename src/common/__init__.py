@@ -1,6 +1,15 @@
-from common import llm
 from common.ids import generate_id
 from common.jsonio import load_json, atomic_write_json
 from common.text_template import render_template
 
 __all__ = ["llm", "generate_id", "load_json", "atomic_write_json", "render_template"]
+
+
+def __getattr__(name):
+    # common.llm pulls in litellm (seconds to import); load it on first use so
+    # lightweight imports such as common.jsonio stay cheap.
+    if name == "llm":
+        import importlib
+
+        return importlib.import_module("common.llm")
+    raise AttributeError(f"module 'common' has no attribute {name!r}")
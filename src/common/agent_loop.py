@@ -1,10 +1,9 @@
 from __future__ import annotations
 
-import json
 from dataclasses import dataclass
 from typing import Any, Callable
 
-from common import llm
+from common import jsonio, llm
 from common.events import (
     AssistantDeltaEvent,
     AssistantMessageEvent,
@@ -13,6 +12,11 @@ from common.events import (
     ToolCallEvent,
     ToolResultEvent,
 )
+from common.response_cache import ResponseCache, cache_key
+
+
+# Tool results are re-sent on every later request; keep each one bounded.
+MAX_TOOL_RESULT_CHARS = 32_000
 
 
 @dataclass(frozen=True, slots=True)
@@ -24,6 +28,8 @@ class LoopConfig:
     max_tokens: int = 4096
     stream: bool = True
     use_tools: bool = True
+    context_messages: int = 0
+    max_tool_result_chars: int = MAX_TOOL_RESULT_CHARS
 
 
 @dataclass(frozen=True, slots=True)
@@ -32,6 +38,49 @@ class LoopResult:
     final_response: str
 
 
+@dataclass(slots=True)
+class StreamResponse:
+    content: str
+    tool_calls: list[dict[str, Any]]
+
+
+def _tool_call_dict(tool_call: Any) -> dict[str, Any]:
+    return {
+        "id": tool_call.id,
+        "type": "function",
+        "function": {
+            "name": tool_call.function.name,
+            "arguments": tool_call.function.arguments,
+        },
+    }
+
+
+def _tool_result_content(result: Any) -> str:
+    # Successful text results go to the model as-is; JSON-encoding a large
+    # file read would only copy it and escape every newline.
+    if isinstance(result, dict) and result.get("success") and isinstance(result.get("result"), str):
+        return result["result"]
+    return jsonio.dumps(result)
+
+
+def _clip_tool_result(content: str, limit: int) -> str:
+    if limit <= 0 or len(content) <= limit:
+        return content
+    half = limit // 2
+    omitted = len(content) - 2 * half
+    return f"{content[:half]}\n...[truncated {omitted} chars]...\n{content[-half:]}"
+
+
+def _with_prefix_breakpoints(api_messages: list[dict], prefix_len: int) -> list[dict]:
+    if prefix_len <= 0:
+        return api_messages
+    marked = list(api_messages)
+    for idx in {0, prefix_len - 1}:
+        if idx < len(marked):
+            marked[idx] = llm.with_cache_control(marked[idx])
+    return marked
+
+
 def _stream_to_message(
     *,
     model: str,
@@ -40,7 +89,7 @@ def _stream_to_message(
     max_tokens: int,
     tools: list[dict] | None,
     emitter: EventEmitter | None,
-) -> Any:
+) -> StreamResponse:
     stream = llm.completion(
         model=model,
         messages=messages,
@@ -51,7 +100,9 @@ def _stream_to_message(
         max_tokens=max_tokens,
     )
 
-    accumulated_content = ""
+    # Deltas are collected in lists and joined once; `+=` on str copies the
+    # whole buffer, which adds up for long write_file arguments.
+    content_parts: list[str] = []
     accumulated_tool_calls: dict[int, dict[str, Any]] = {}
 
     for chunk in stream:
@@ -59,7 +110,7 @@ def _stream_to_message(
 
         if hasattr(delta, "content") and delta.content:
             content = delta.content
-            accumulated_content += content
+            content_parts.append(content)
             if emitter is not None:
                 emitter.emit(AssistantDeltaEvent(text=content))
 
@@ -71,7 +122,7 @@ def _stream_to_message(
                     accumulated_tool_calls[idx] = {
                         "id": "",
                         "type": "function",
-                        "function": {"name": "", "arguments": ""},
+                        "function": {"name": "", "arguments": []},
                     }
 
                 if tc.id:
@@ -80,30 +131,14 @@ def _stream_to_message(
                     if tc.function.name:
                         accumulated_tool_calls[idx]["function"]["name"] = tc.function.name
                     if tc.function.arguments:
-                        accumulated_tool_calls[idx]["function"]["arguments"] += tc.function.arguments
-
-    class Response:
-        def __init__(self, content: str, tool_calls: dict[int, dict[str, Any]]):
-            self.content = content
-            self.tool_calls: list[Any] = []
-
-            for tc_data in tool_calls.values():
-
-                class ToolCall:
-                    def __init__(self, data: dict[str, Any]):
-                        self.id = data["id"]
-                        self.type = data["type"]
-
-                        class Function:
-                            def __init__(self, func_data: dict[str, Any]):
-                                self.name = func_data["name"]
-                                self.arguments = func_data["arguments"]
-
-                        self.function = Function(data["function"])
-
-                self.tool_calls.append(ToolCall(tc_data))
+                        accumulated_tool_calls[idx]["function"]["arguments"].append(
+                            tc.function.arguments
+                        )
 
-    return Response(accumulated_content, accumulated_tool_calls)
+    tool_calls = list(accumulated_tool_calls.values())
+    for tool_call in tool_calls:
+        tool_call["function"]["arguments"] = "".join(tool_call["function"]["arguments"])
+    return StreamResponse("".join(content_parts), tool_calls)
 
 
 def run_loop(
@@ -112,21 +147,59 @@ def run_loop(
     execute_tool: Callable[[str, dict], Any],
     config: LoopConfig,
     emitter: EventEmitter | None = None,
+    execute_tools: Callable[[list[tuple[str, dict]]], list[Any]] | None = None,
+    response_cache: ResponseCache | None = None,
 ) -> LoopResult:
     final_response = ""
     tools_arg = tools if (config.use_tools and tools) else None
     iteration = 0
+    # System prompt plus pinned context files form the stable, cacheable prefix.
+    mark_cache = llm.supports_cache_control(config.model)
+    cache_prefix = (
+        (1 if config.system_prompt else 0) + config.context_messages if mark_cache else 0
+    )
+    # A second, moving breakpoint on the newest message lets each request
+    # reuse everything the previous one sent, not just the static prefix.
+    marked_tail: tuple[int, dict] | None = None
+
+    # Built once; new messages are appended to both lists below.
+    api_messages = _with_prefix_breakpoints(
+        ([{"role": "system", "content": config.system_prompt}] if config.system_prompt else [])
+        + messages,
+        cache_prefix,
+    )
 
-    for iteration in range(1, config.max_iterations + 1):
-        api_messages = (
-            ([{"role": "system", "content": config.system_prompt}] if config.system_prompt else [])
-            + messages
-        )
+    def append(message: dict) -> None:
+        messages.append(message)
+        api_messages.append(message)
 
+    def extend(batch: list[dict]) -> None:
+        messages.extend(batch)
+        api_messages.extend(batch)
+
+    for iteration in range(1, config.max_iterations + 1):
         if emitter is not None:
             emitter.emit(AssistantResponseStartEvent(iteration=iteration))
 
-        if config.stream:
+        last = len(api_messages) - 1
+        if mark_cache and last >= cache_prefix and (marked_tail is None or marked_tail[0] != last):
+            if marked_tail is not None:
+                api_messages[marked_tail[0]] = marked_tail[1]
+            marked_tail = (last, api_messages[last])
+            api_messages[last] = llm.with_cache_control(api_messages[last])
+
+        # Only deterministic, tool-free requests are safe to replay.
+        key = None
+        cached = None
+        if response_cache is not None and tools_arg is None and config.temperature == 0:
+            key = cache_key(config.model, api_messages, config.temperature)
+            cached = response_cache.get(key)
+
+        if cached is not None:
+            response = StreamResponse(cached, [])
+            if config.stream and emitter is not None:
+                emitter.emit(AssistantDeltaEvent(text=cached))
+        elif config.stream:
             response = _stream_to_message(
                 model=config.model,
                 messages=api_messages,
@@ -145,63 +218,71 @@ def run_loop(
                 temperature=config.temperature,
                 max_tokens=config.max_tokens,
             )
-            response = completion.choices[0].message
+            message = completion.choices[0].message
+            response = StreamResponse(
+                message.content,
+                [_tool_call_dict(tc) for tc in getattr(message, "tool_calls", None) or []],
+            )
+
+        if key is not None and cached is None and response.content and not response.tool_calls:
+            response_cache.set(key, response.content)
 
-        tool_calls = getattr(response, "tool_calls", None) or []
+        tool_calls = response.tool_calls
         if tool_calls:
-            messages.append(
+            append(
                 {
                     "role": "assistant",
                     "content": response.content,
-                    "tool_calls": [
-                        {
-                            "id": tc.id,
-                            "type": "function",
-                            "function": {
-                                "name": tc.function.name,
-                                "arguments": tc.function.arguments,
-                            },
-                        }
-                        for tc in tool_calls
-                    ],
+                    "tool_calls": tool_calls,
                 }
             )
 
-            for tool_call in tool_calls:
-                tool_name = tool_call.function.name
-                tool_args = json.loads(tool_call.function.arguments)
-                if emitter is not None:
+            calls = [
+                (tool_call["function"]["name"], jsonio.loads(tool_call["function"]["arguments"]))
+                for tool_call in tool_calls
+            ]
+            if emitter is not None:
+                for tool_call, (tool_name, tool_args) in zip(tool_calls, calls):
                     emitter.emit(
                         ToolCallEvent(
-                            tool_call_id=tool_call.id,
+                            tool_call_id=tool_call["id"],
                             tool_name=tool_name,
                             args=tool_args,
                         )
                     )
 
-                result = execute_tool(tool_name, tool_args)
+            if execute_tools is not None:
+                results = execute_tools(calls)
+            else:
+                results = [execute_tool(tool_name, tool_args) for tool_name, tool_args in calls]
+
+            tool_messages = []
+            for tool_call, (tool_name, _), result in zip(tool_calls, calls, results):
                 if emitter is not None:
                     emitter.emit(
                         ToolResultEvent(
-                            tool_call_id=tool_call.id,
+                            tool_call_id=tool_call["id"],
                             tool_name=tool_name,
                             result=result,
                         )
                     )
-                messages.append(
+                tool_messages.append(
                     {
                         "role": "tool",
-                        "tool_call_id": tool_call.id,
+                        "tool_call_id": tool_call["id"],
                         "name": tool_name,
-                        "content": json.dumps(result),
+                        "content": _clip_tool_result(
+                            _tool_result_content(result), config.max_tool_result_chars
+                        ),
                     }
                 )
+            extend(tool_messages)
 
             continue
 
         if response.content:
             final_response = response.content
-            messages.append({"role": "assistant", "content": response.content})
+            append({"role": "assistant", "content": response.content})
             if emitter is not None:
                 emitter.emit(AssistantMessageEvent(content=response.content))
         break
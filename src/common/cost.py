@@ -8,12 +8,16 @@ class Usage:
     prompt_tokens: int = 0
     completion_tokens: int = 0
     total_tokens: int = 0
+    cache_creation_input_tokens: int = 0
+    cache_read_input_tokens: int = 0
     cost_usd: float = 0.0
 
 
 @dataclass
 class CostTotals:
     total_tokens: int = 0
+    cache_creation_input_tokens: int = 0
+    cache_read_input_tokens: int = 0
     total_cost_usd: float = 0.0
     calls: int = 0
     calls_by_kind: dict[str, int] = field(default_factory=dict)
@@ -27,6 +31,8 @@ class CostTracker:
         self._totals.calls += 1
         self._totals.calls_by_kind[kind] = self._totals.calls_by_kind.get(kind, 0) + 1
         self._totals.total_tokens += int(usage.total_tokens or 0)
+        self._totals.cache_creation_input_tokens += int(usage.cache_creation_input_tokens or 0)
+        self._totals.cache_read_input_tokens += int(usage.cache_read_input_tokens or 0)
         self._totals.total_cost_usd += float(usage.cost_usd or 0.0)
 
     def totals(self) -> CostTotals:
@@ -39,6 +45,8 @@ def parse_usage(data: dict | None) -> Usage:
         prompt_tokens=int(data.get("prompt_tokens") or 0),
         completion_tokens=int(data.get("completion_tokens") or 0),
         total_tokens=int(data.get("total_tokens") or 0),
+        cache_creation_input_tokens=int(data.get("cache_creation_input_tokens") or 0),
+        cache_read_input_tokens=int(data.get("cache_read_input_tokens") or 0),
         cost_usd=float(data.get("cost_usd") or 0.0),
     )
 
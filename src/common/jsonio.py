@@ -3,22 +3,55 @@ import os
 from pathlib import Path
 from typing import Any
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+def dumps(data: Any) -> str:
+    """Compact JSON encoding; uses orjson when installed."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(data).decode("utf-8")
+        except TypeError:
+            pass
+    return json.dumps(data)
+
+
+def loads(payload: str | bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
 
 def load_json(path: str | Path) -> dict | None:
     try:
-        with open(path, "r", encoding="utf-8") as handle:
-            return json.load(handle)
+        with open(path, "rb") as handle:
+            return loads(handle.read())
     except FileNotFoundError:
         return None
-    except json.JSONDecodeError:
+    except (json.JSONDecodeError, ValueError):
         return None
 
 
-def atomic_write_json(path: str | Path, data: Any) -> None:
+def atomic_write_json(path: str | Path, data: Any, indent: bool = True) -> None:
     target = Path(path)
     target.parent.mkdir(parents=True, exist_ok=True)
     tmp_path = target.with_suffix(f"{target.suffix}.tmp")
-    payload = json.dumps(data, indent=2, sort_keys=True)
-    with open(tmp_path, "w", encoding="utf-8") as handle:
+    # Sessions are rewritten after every tool result; orjson keeps that cheap.
+    payload = None
+    if orjson is not None:
+        option = orjson.OPT_SORT_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        try:
+            payload = orjson.dumps(data, option=option)
+        except TypeError:
+            pass
+    if payload is None:
+        separators = None if indent else (",", ":")
+        payload = json.dumps(
+            data, indent=2 if indent else None, separators=separators, sort_keys=True
+        ).encode("utf-8")
+    with open(tmp_path, "wb") as handle:
         handle.write(payload)
     os.replace(tmp_path, target)
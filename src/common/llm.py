@@ -1,3 +1,5 @@
+import threading
+import time
 import warnings
 from typing import Any
 
@@ -7,6 +9,13 @@ from litellm import completion as litellm_completion
 warnings.filterwarnings("ignore", message="Pydantic serializer warnings")
 litellm.drop_params = True
 
+RateLimitError = litellm.RateLimitError
+
+# Process-wide pause after a rate limit, so parallel workers sharing the same
+# quota back off together instead of each hitting the limit on its own.
+_cooldown_lock = threading.Lock()
+_cooldown_until = 0.0
+
 
 def completion(
     model: str,
@@ -31,9 +40,42 @@ def completion(
         params["tools"] = tools
         params["tool_choice"] = tool_choice or "auto"
 
+    wait_for_rate_limit()
     return litellm_completion(**params)
 
 
+def retry_after(error: Exception) -> float | None:
+    # Provider hint from a 429: retry-after-ms, or retry-after in seconds.
+    for headers in (
+        getattr(error, "headers", None),
+        getattr(getattr(error, "response", None), "headers", None),
+        getattr(error, "litellm_response_headers", None),
+    ):
+        if not headers:
+            continue
+        for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+            value = headers.get(name)
+            try:
+                delay = float(value) * scale
+            except (TypeError, ValueError):
+                continue
+            if delay >= 0:
+                return delay
+    return None
+
+
+def note_rate_limit(delay: float) -> None:
+    global _cooldown_until
+    with _cooldown_lock:
+        _cooldown_until = max(_cooldown_until, time.monotonic() + delay)
+
+
+def wait_for_rate_limit() -> None:
+    remaining = _cooldown_until - time.monotonic()
+    if remaining > 0:
+        time.sleep(remaining)
+
+
 def completion_with_usage(
     model: str,
     messages: list[dict],
@@ -64,11 +106,39 @@ def completion_with_usage(
         "prompt_tokens": int(getattr(usage, "prompt_tokens", 0) or 0),
         "completion_tokens": int(getattr(usage, "completion_tokens", 0) or 0),
         "total_tokens": int(getattr(usage, "total_tokens", 0) or 0),
+        "cache_creation_input_tokens": int(getattr(usage, "cache_creation_input_tokens", 0) or 0),
+        "cache_read_input_tokens": _cache_read_tokens(usage),
         "cost_usd": cost_usd,
     }
     return response, usage_dict
 
 
+def _cache_read_tokens(usage: Any) -> int:
+    cached = getattr(usage, "cache_read_input_tokens", None)
+    if not cached:
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = getattr(details, "cached_tokens", None)
+    return int(cached or 0)
+
+
+def supports_cache_control(model: str) -> bool:
+    # Anthropic models (direct, Bedrock, Vertex) only cache prefixes marked
+    # with an explicit breakpoint; OpenAI-style providers cache automatically.
+    return "claude" in model.lower()
+
+
+def with_cache_control(message: dict) -> dict:
+    content = message.get("content")
+    if not isinstance(content, str) or not content:
+        return message
+    return {
+        **message,
+        "content": [
+            {"type": "text", "text": content, "cache_control": {"type": "ephemeral"}}
+        ],
+    }
+
+
 def get_model_info(model: str) -> dict:
     try:
         return litellm.get_model_info(model)
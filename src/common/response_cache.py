@@ -0,0 +1,67 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from common import jsonio
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    content TEXT NOT NULL,
+    created_at REAL NOT NULL DEFAULT 0
+)
+"""
+
+
+def cache_key(model: str, messages: list[dict], temperature: float) -> str:
+    payload = jsonio.dumps({"m": messages, "model": model, "t": temperature})
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class ResponseCache:
+    """Disk-backed prompt -> completion cache for deterministic, tool-free requests."""
+
+    def __init__(self, path: str | Path, ttl: float | None = None):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(responses)")}
+        if "created_at" not in columns:
+            # Caches written before entries were timestamped count as expired.
+            self._conn.execute(
+                "ALTER TABLE responses ADD COLUMN created_at REAL NOT NULL DEFAULT 0"
+            )
+        if ttl is not None:
+            self._conn.execute(
+                "DELETE FROM responses WHERE created_at < ?", (time.time() - ttl,)
+            )
+        self._conn.commit()
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        if self.ttl is not None and time.time() - row[1] > self.ttl:
+            return None
+        return row[0]
+
+    def set(self, key: str, content: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, content, created_at) VALUES (?, ?, ?)",
+                (key, content, time.time()),
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -126,6 +126,22 @@ class Storage:
             cursor.execute(sql, params)
             return cursor.fetchall()
 
+    def _iterall(
+        self, sql: str, params: tuple = (), batch_size: int = 500
+    ) -> Iterator[sqlite3.Row]:
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.execute(sql, params)
+        try:
+            while True:
+                with self._lock:
+                    rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                yield from rows
+        finally:
+            cursor.close()
+
     def save_document(self, doc: RawDocument) -> None:
         try:
             with self._lock:
@@ -232,7 +248,7 @@ class Storage:
         return [self._row_to_snippet(row) for row in rows]
 
     def get_all_snippets(self) -> Iterator[PainSnippet]:
-        rows = self._fetchall("SELECT * FROM snippets ORDER BY extracted_at DESC")
+        rows = self._iterall("SELECT * FROM snippets ORDER BY extracted_at DESC")
         for row in rows:
             yield self._row_to_snippet(row)
 
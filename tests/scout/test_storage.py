@@ -91,6 +91,40 @@ class TestStorage:
         assert snippets[0].snippet_id == "snip123"
         assert snippets[0].pain_statement == "Product is frustrating"
 
+    def test_get_all_snippets_streams_in_batches(self, storage):
+        doc = RawDocument(
+            doc_id="reddit:t3_many",
+            source="reddit",
+            source_entity="r/test",
+            url="https://reddit.com/r/test/many",
+            permalink="/r/test/comments/many",
+            title="Many",
+            raw_text="Content",
+        )
+        storage.save_document(doc)
+        for i in range(1203):
+            storage.save_snippet(
+                PainSnippet(
+                    snippet_id=f"snip{i}",
+                    doc_id=doc.doc_id,
+                    excerpt="excerpt",
+                    pain_statement=f"Pain {i}",
+                    signal_type="complaint",
+                    intensity=3,
+                    confidence=0.8,
+                    entities=[],
+                    extractor_model="gpt-4o",
+                    extractor_prompt_version="v1",
+                )
+            )
+
+        ids = set()
+        for snippet in storage.get_all_snippets():
+            ids.add(snippet.snippet_id)
+            assert storage.document_exists(doc.doc_id)
+
+        assert len(ids) == 1203
+
     def test_get_document_count(self, storage):
         assert storage.get_document_count() == 0
 
@@ -0,0 +1,250 @@
+from types import SimpleNamespace
+
+from common import agent_loop
+from common.agent_loop import LoopConfig, run_loop
+
+
+def _tool_call(call_id: str, name: str, arguments: str):
+    return SimpleNamespace(
+        id=call_id,
+        type="function",
+        function=SimpleNamespace(name=name, arguments=arguments),
+    )
+
+
+def _completion(content=None, tool_calls=None):
+    message = SimpleNamespace(content=content, tool_calls=tool_calls)
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def test_run_loop_batches_tool_calls(monkeypatch):
+    responses = iter(
+        [
+            _completion(
+                tool_calls=[
+                    _tool_call("a", "read_file", '{"filepath": "a.py"}'),
+                    _tool_call("b", "read_file", '{"filepath": "b.py"}'),
+                ]
+            ),
+            _completion(content="done"),
+        ]
+    )
+    monkeypatch.setattr(agent_loop.llm, "completion", lambda **kwargs: next(responses))
+
+    batches = []
+
+    def execute_tools(calls):
+        batches.append(calls)
+        return [{"success": True, "result": args["filepath"]} for _, args in calls]
+
+    messages = [{"role": "user", "content": "read both"}]
+    result = run_loop(
+        messages=messages,
+        tools=[{"type": "function", "function": {"name": "read_file"}}],
+        execute_tool=lambda name, args: None,
+        execute_tools=execute_tools,
+        config=LoopConfig(model="gpt-4o", stream=False),
+    )
+
+    assert result.final_response == "done"
+    assert batches == [[("read_file", {"filepath": "a.py"}), ("read_file", {"filepath": "b.py"})]]
+    tool_messages = [m for m in messages if m["role"] == "tool"]
+    assert [m["tool_call_id"] for m in tool_messages] == ["a", "b"]
+    assert [m["content"] for m in tool_messages] == ["a.py", "b.py"]
+
+
+def test_run_loop_marks_cacheable_prefix_for_claude(monkeypatch):
+    seen = []
+
+    def completion(**kwargs):
+        seen.append(list(kwargs["messages"]))
+        return _completion(content="done")
+
+    monkeypatch.setattr(agent_loop.llm, "completion", completion)
+    messages = [
+        {"role": "user", "content": "=== a.py ==="},
+        {"role": "user", "content": "question"},
+    ]
+
+    run_loop(
+        messages=messages,
+        tools=[],
+        execute_tool=lambda name, args: {},
+        config=LoopConfig(
+            model="claude-sonnet-4-20250514",
+            system_prompt="system",
+            stream=False,
+            context_messages=1,
+        ),
+    )
+
+    api_messages = seen[0]
+    breakpoint = {"type": "ephemeral"}
+    assert api_messages[0]["content"][0]["cache_control"] == breakpoint
+    assert api_messages[1]["content"][0]["cache_control"] == breakpoint
+    assert api_messages[2]["content"][0]["cache_control"] == breakpoint
+    assert messages[:2] == [
+        {"role": "user", "content": "=== a.py ==="},
+        {"role": "user", "content": "question"},
+    ]
+
+
+def test_run_loop_moves_tail_breakpoint_for_claude(monkeypatch):
+    responses = iter(
+        [
+            _completion(tool_calls=[_tool_call("a", "read_file", '{"filepath": "a.py"}')]),
+            _completion(content="done"),
+        ]
+    )
+    seen = []
+
+    def completion(**kwargs):
+        seen.append(list(kwargs["messages"]))
+        return next(responses)
+
+    monkeypatch.setattr(agent_loop.llm, "completion", completion)
+
+    run_loop(
+        messages=[{"role": "user", "content": "read"}],
+        tools=[],
+        execute_tool=lambda name, args: {"success": True},
+        config=LoopConfig(model="claude-sonnet-4-20250514", system_prompt="system", stream=False),
+    )
+
+    def marked(api_messages):
+        return [i for i, m in enumerate(api_messages) if isinstance(m.get("content"), list)]
+
+    assert marked(seen[0]) == [0, 1]
+    assert marked(seen[1]) == [0, 3]
+    assert seen[1][1] == {"role": "user", "content": "read"}
+
+
+def test_run_loop_leaves_messages_plain_for_other_models(monkeypatch):
+    seen = []
+
+    def completion(**kwargs):
+        seen.append(list(kwargs["messages"]))
+        return _completion(content="done")
+
+    monkeypatch.setattr(agent_loop.llm, "completion", completion)
+
+    run_loop(
+        messages=[{"role": "user", "content": "question"}],
+        tools=[],
+        execute_tool=lambda name, args: {},
+        config=LoopConfig(model="gpt-4o", system_prompt="system", stream=False),
+    )
+
+    assert seen[0] == [
+        {"role": "system", "content": "system"},
+        {"role": "user", "content": "question"},
+    ]
+
+
+def test_run_loop_reuses_api_message_list(monkeypatch):
+    responses = iter(
+        [
+            _completion(tool_calls=[_tool_call("a", "read_file", '{"filepath": "a.py"}')]),
+            _completion(content="done"),
+        ]
+    )
+    seen = []
+
+    def completion(**kwargs):
+        seen.append((kwargs["messages"], len(kwargs["messages"])))
+        return next(responses)
+
+    monkeypatch.setattr(agent_loop.llm, "completion", completion)
+    messages = [{"role": "user", "content": "read"}]
+
+    run_loop(
+        messages=messages,
+        tools=[],
+        execute_tool=lambda name, args: {"success": True},
+        config=LoopConfig(model="gpt-4o", system_prompt="system", stream=False),
+    )
+
+    (first, first_len), (second, second_len) = seen
+    assert first is second
+    assert (first_len, second_len) == (2, 4)
+    assert first[1:] == messages
+
+
+def _chunk(content=None, tool_calls=None):
+    delta = SimpleNamespace(content=content, tool_calls=tool_calls)
+    return SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+
+def _tool_delta(index, call_id=None, name=None, arguments=None):
+    return SimpleNamespace(
+        index=index,
+        id=call_id,
+        function=SimpleNamespace(name=name, arguments=arguments),
+    )
+
+
+def test_run_loop_streams_tool_calls_as_dicts(monkeypatch):
+    streams = iter(
+        [
+            [
+                _chunk(tool_calls=[_tool_delta(0, "a", "read_file", '{"filepath"')]),
+                _chunk(tool_calls=[_tool_delta(0, arguments=': "a.py"}')]),
+            ],
+            [_chunk(content="do"), _chunk(content="ne")],
+        ]
+    )
+    monkeypatch.setattr(agent_loop.llm, "completion", lambda **kwargs: next(streams))
+    calls = []
+
+    def execute_tool(name, args):
+        calls.append((name, args))
+        return {"success": True}
+
+    messages = [{"role": "user", "content": "read"}]
+    result = run_loop(
+        messages=messages,
+        tools=[],
+        execute_tool=execute_tool,
+        config=LoopConfig(model="gpt-4o", stream=True),
+    )
+
+    assert result.final_response == "done"
+    assert calls == [("read_file", {"filepath": "a.py"})]
+    assert messages[1]["tool_calls"] == [
+        {
+            "id": "a",
+            "type": "function",
+            "function": {"name": "read_file", "arguments": '{"filepath": "a.py"}'},
+        }
+    ]
+
+
+def test_run_loop_clips_large_tool_results(monkeypatch):
+    responses = iter(
+        [
+            _completion(tool_calls=[_tool_call("a", "read_file", '{"filepath": "big.py"}')]),
+            _completion(content="done"),
+        ]
+    )
+    monkeypatch.setattr(agent_loop.llm, "completion", lambda **kwargs: next(responses))
+    messages = [{"role": "user", "content": "read"}]
+
+    run_loop(
+        messages=messages,
+        tools=[],
+        execute_tool=lambda name, args: {"success": True, "result": "x" * 500},
+        config=LoopConfig(model="gpt-4o", stream=False, max_tool_result_chars=100),
+    )
+
+    content = messages[2]["content"]
+    assert content.startswith("xxx")
+    assert "...[truncated" in content
+    assert len(content) < 200
+
+
+def test_tool_result_content_passes_text_through():
+    assert agent_loop._tool_result_content({"success": True, "result": "a\nb"}) == "a\nb"
+    assert agent_loop._tool_result_content({"success": False, "error": "boom"}) == (
+        '{"success":false,"error":"boom"}'
+    )
+    assert agent_loop._tool_result_content({"success": True, "result": ["a"]}).startswith("{")
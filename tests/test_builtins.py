@@ -0,0 +1,44 @@
+from types import SimpleNamespace
+
+from anvil.history import MessageHistory
+from anvil.runtime.builtins import BuiltinCommands
+
+
+class FakeEncoder:
+    def __init__(self):
+        self.encoded: list[str] = []
+
+    def encode_batch(self, texts):
+        self.encoded.extend(texts)
+        return [text.split() for text in texts]
+
+
+def _builtins():
+    history = MessageHistory()
+    history.set_system_prompt("be brief")
+    builtins = BuiltinCommands(SimpleNamespace(history=history))
+    builtins._token_encoder = FakeEncoder()
+    return builtins, history
+
+
+class TestTokenCount:
+    def test_only_new_messages_are_encoded(self, capsys):
+        builtins, history = _builtins()
+        history.add_user_message("one two three")
+        builtins.cmd_tokens("")
+        history.add_assistant_message("four five")
+        builtins.cmd_tokens("")
+
+        assert builtins._token_encoder.encoded == ["be brief", "one two three", "four five"]
+        assert "~7" in capsys.readouterr().out.splitlines()[-1]
+
+    def test_rebuilt_history_is_recounted(self, capsys):
+        builtins, history = _builtins()
+        history.add_user_message("one two three")
+        builtins.cmd_tokens("")
+        history.add_context_message("ctx")
+        history.messages = history.messages[:1]
+        builtins.cmd_tokens("")
+
+        assert sum(builtins._msg_tokens) == 3
+        assert "~3" in capsys.readouterr().out.splitlines()[-1]
@@ -0,0 +1,153 @@
+import os
+import re
+import sys
+
+import pytest
+
+from anvil import cli
+
+
+class TestDotenvCache:
+    def _setup(self, tmp_path, monkeypatch, text):
+        env = tmp_path / ".env"
+        env.write_text(text)
+        monkeypatch.setattr(cli, "_find_dotenv", lambda: str(env))
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+        return env
+
+    def test_second_load_skips_the_parser(self, tmp_path, monkeypatch):
+        self._setup(tmp_path, monkeypatch, "ANVIL_TEST_A=1\n")
+        monkeypatch.delenv("ANVIL_TEST_A", raising=False)
+        cli._load_dotenv_cached()
+        assert os.environ["ANVIL_TEST_A"] == "1"
+        assert oct((tmp_path / "cache" / "anvil" / "dotenv.json").stat().st_mode & 0o777) == "0o600"
+
+        monkeypatch.delenv("ANVIL_TEST_A")
+        monkeypatch.setitem(sys.modules, "dotenv", None)
+        cli._load_dotenv_cached()
+        assert os.environ["ANVIL_TEST_A"] == "1"
+
+    def test_edited_env_is_reparsed(self, tmp_path, monkeypatch):
+        env = self._setup(tmp_path, monkeypatch, "ANVIL_TEST_A=1\n")
+        monkeypatch.delenv("ANVIL_TEST_A", raising=False)
+        cli._load_dotenv_cached()
+
+        env.write_text("ANVIL_TEST_A=22\n")
+        monkeypatch.delenv("ANVIL_TEST_A")
+        cli._load_dotenv_cached()
+        assert os.environ["ANVIL_TEST_A"] == "22"
+
+    def test_existing_environment_wins(self, tmp_path, monkeypatch):
+        self._setup(tmp_path, monkeypatch, "ANVIL_TEST_A=1\n")
+        monkeypatch.setenv("ANVIL_TEST_A", "shell")
+
+        cli._load_dotenv_cached()
+
+        assert os.environ["ANVIL_TEST_A"] == "shell"
+
+    def test_interpolated_values_are_not_cached(self, tmp_path, monkeypatch):
+        self._setup(tmp_path, monkeypatch, "ANVIL_TEST_B=${HOME}/x\n")
+        monkeypatch.delenv("ANVIL_TEST_B", raising=False)
+
+        cli._load_dotenv_cached()
+
+        assert os.environ["ANVIL_TEST_B"] == os.environ["HOME"] + "/x"
+        assert not (tmp_path / "cache" / "anvil" / "dotenv.json").exists()
+
+
+class TestParser:
+    def test_only_the_invoked_subcommand_gets_arguments(self):
+        parser = cli._build_parser("sessions")
+
+        args = parser.parse_args(["sessions", "list", "--limit", "5"])
+
+        assert (args.command, args.sessions_cmd, args.limit) == ("sessions", "list", 5)
+        subparsers = parser._subparsers._group_actions[0].choices
+        assert len(subparsers["research"]._actions) == 1  # just -h
+
+    def test_full_parser_lists_every_subcommand(self):
+        help_text = cli._build_parser().format_help()
+
+        assert all(name in help_text for name in cli._SUBCOMMANDS)
+
+
+class TestGitRoot:
+    def test_finds_root_without_spawning_git(self, temp_repo, monkeypatch):
+        nested = temp_repo / "a" / "b"
+        nested.mkdir(parents=True)
+        monkeypatch.chdir(nested)
+        monkeypatch.setattr(cli.subprocess, "run", pytest.fail)
+
+        assert cli._git_root_or_exit() == str(temp_repo.resolve())
+
+    def test_worktree_git_file(self, tmp_path):
+        (tmp_path / ".git").write_text("gitdir: /elsewhere/.git/worktrees/wt\n")
+
+        assert cli._find_git_root(tmp_path / "src") == tmp_path
+
+    def test_unclear_layouts_defer_to_git(self, tmp_path):
+        (tmp_path / ".git").mkdir()
+
+        assert cli._find_git_root(tmp_path) is None
+        assert cli._find_git_root(tmp_path / ".git" / "hooks") is None
+
+    def test_outside_a_repo_exits(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv("ANVIL_GIT_SUBPROCESS", "1")
+
+        with pytest.raises(SystemExit):
+            cli._git_root_or_exit()
+
+
+class TestNetloc:
+    @pytest.mark.parametrize(
+        "url",
+        [
+            "https://example.com/a/b",
+            "http://user@example.com:8080",
+            "https://example.com?q=1",
+            "https://example.com#frag",
+            "https://Example.COM/path?x=/y",
+        ],
+    )
+    def test_matches_urlparse(self, url):
+        from urllib.parse import urlparse
+
+        assert cli._netloc(url) == urlparse(url).netloc
+
+
+class TestTimestamps:
+    def test_utc_ts_format(self):
+        assert re.fullmatch(r"\d{4}-\d\d-\d\dT\d\d:\d\d:\d\dZ", cli._utc_ts())
+
+    def test_log_prefix(self, capsys):
+        cli._log("plan", "hello")
+
+        err = capsys.readouterr().err
+        assert re.fullmatch(r"\d{4}-\d\d-\d\d \d\d:\d\d:\d\d \[plan\] hello\n", err)
+
+
+class TestMain:
+    def test_no_args_starts_repl_without_a_parser(self, monkeypatch):
+        calls = []
+        monkeypatch.setattr(cli, "_build_parser", pytest.fail)
+        monkeypatch.setattr(cli, "_cmd_repl", lambda **kwargs: calls.append(kwargs) or 0)
+
+        assert cli._main([]) == 0
+        assert calls[0]["model"] == "gpt-4o" and calls[0]["files"] == []
+
+    def test_subcommands_dispatch_by_name(self, monkeypatch):
+        seen = []
+        monkeypatch.setitem(cli._DISPATCH, "sessions", lambda args: seen.append(args) or 7)
+
+        assert cli._main(["sessions", "list"]) == 7
+        assert seen[0].sessions_cmd == "list"
+
+    @pytest.mark.parametrize(
+        "flags", [["--coverage-warn", "--coverage-strict"], ["--curated-max-total", "-1"]]
+    )
+    def test_research_flag_errors_exit_before_setup(self, flags, monkeypatch):
+        monkeypatch.setattr(cli, "_git_root_or_exit", pytest.fail)
+        monkeypatch.delenv("TAVILY_API_KEY", raising=False)
+
+        assert cli._main(["research", "q", *flags]) == 2
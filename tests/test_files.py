@@ -1,3 +1,6 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
 from anvil.files import FileManager
 
@@ -12,6 +15,68 @@ class TestFileManager:
 
         assert content == "hello world"
 
+    def test_read_file_reflects_external_changes(self, tmp_path):
+        test_file = tmp_path / "test.txt"
+        test_file.write_text("first")
+
+        fm = FileManager(str(tmp_path))
+        assert fm.read_file("test.txt") == "first"
+
+        test_file.write_text("second version")
+        os.utime(test_file, ns=(0, 1_000_000_000))
+
+        assert fm.read_file("test.txt") == "second version"
+
+    def test_read_file_detects_same_mtime_size_change(self, tmp_path):
+        test_file = tmp_path / "test.txt"
+        test_file.write_text("first")
+        os.utime(test_file, ns=(0, 1_000_000_000))
+
+        fm = FileManager(str(tmp_path))
+        assert fm.read_file("test.txt") == "first"
+
+        test_file.write_text("second version")
+        os.utime(test_file, ns=(0, 1_000_000_000))
+
+        assert fm.read_file("test.txt") == "second version"
+
+    def test_read_cache_is_bounded(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("anvil.files.READ_CACHE_SIZE", 2)
+        for name in ("a.txt", "b.txt", "c.txt"):
+            (tmp_path / name).write_text(name)
+
+        fm = FileManager(str(tmp_path))
+        for name in ("a.txt", "b.txt", "c.txt"):
+            fm.read_file(name)
+
+        assert [os.path.basename(p) for p in fm._cache] == ["b.txt", "c.txt"]
+
+    def test_read_file_normalizes_newlines(self, tmp_path):
+        (tmp_path / "crlf.txt").write_bytes(b"a\r\nb\r\n")
+
+        fm = FileManager(str(tmp_path))
+
+        assert fm.read_file("crlf.txt") == "a\nb\n"
+
+    def test_read_lines(self, tmp_path):
+        (tmp_path / "lines.txt").write_text("one\ntwo\nthree\nfour")
+
+        fm = FileManager(str(tmp_path))
+
+        assert fm.read_lines("lines.txt", 2, 2) == "two\nthree\n"
+        assert fm.read_lines("lines.txt", 3) == "three\nfour"
+        assert fm.read_lines("lines.txt", 9, 1) == ""
+
+    def test_read_lines_mapped_matches_cached(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("anvil.files.MMAP_MIN_BYTES", 1)
+        (tmp_path / "big.txt").write_bytes(b"a\r\nb\r\nc\r\nd\r\n")
+
+        mapped = FileManager(str(tmp_path)).read_lines("big.txt", 2, 2)
+        fm = FileManager(str(tmp_path))
+        fm.read_file("big.txt")
+
+        assert mapped == fm.read_lines("big.txt", 2, 2) == "b\nc\n"
+
     def test_write_file(self, tmp_path):
         fm = FileManager(str(tmp_path))
         fm.write_file("new_file.txt", "new content")
@@ -36,6 +101,49 @@ class TestFileManager:
         assert "a.py" in py_files
         assert "b.py" in py_files
 
+    def test_list_files_recurses_and_skips_ignored(self, tmp_path):
+        (tmp_path / "src" / "pkg").mkdir(parents=True)
+        (tmp_path / "src" / "pkg" / "mod.py").write_text("")
+        (tmp_path / "node_modules").mkdir()
+        (tmp_path / "node_modules" / "dep.py").write_text("")
+        (tmp_path / ".hidden.py").write_text("")
+
+        fm = FileManager(str(tmp_path))
+
+        assert fm.list_files("*.py") == ["src/pkg/mod.py"]
+
+    def test_list_files_nested_pattern(self, tmp_path):
+        (tmp_path / "src" / "a").mkdir(parents=True)
+        (tmp_path / "src" / "a" / "x.js").write_text("")
+        (tmp_path / "src" / "y.js").write_text("")
+        (tmp_path / "lib").mkdir()
+        (tmp_path / "lib" / "z.js").write_text("")
+
+        fm = FileManager(str(tmp_path))
+
+        assert fm.list_files("src/**/*.js") == ["src/a/x.js", "src/y.js"]
+
+    def test_list_files_cached_until_write(self, tmp_path):
+        (tmp_path / "a.py").write_text("")
+
+        fm = FileManager(str(tmp_path))
+        assert fm.list_files("*.py") == ["a.py"]
+
+        (tmp_path / "outside.py").write_text("")
+        assert fm.list_files("*.py") == ["a.py"]
+
+        fm.write_file("b.py", "")
+        assert fm.list_files("*.py") == ["a.py", "b.py", "outside.py"]
+
+    def test_list_files_invalidate_listings(self, tmp_path):
+        fm = FileManager(str(tmp_path))
+        assert fm.list_files("*.py") == []
+
+        (tmp_path / "new.py").write_text("")
+        fm.invalidate_listings()
+
+        assert fm.list_files("*.py") == ["new.py"]
+
     def test_apply_edit_exact_match(self, tmp_path):
         test_file = tmp_path / "test.py"
         test_file.write_text("def foo():\n    return 1")
@@ -54,3 +162,123 @@ class TestFileManager:
         result = fm.apply_edit("test.py", "nonexistent", "replacement")
 
         assert result is False
+
+    def test_apply_edit_fuzzy_whitespace(self, tmp_path):
+        test_file = tmp_path / "test.py"
+        test_file.write_text("x = 0\ndef foo():\n        return   1\ny = 2\n")
+
+        fm = FileManager(str(tmp_path))
+        result = fm.apply_edit("test.py", "def foo():\n    return 1", "def foo():\n    return 2")
+
+        assert result is True
+        assert test_file.read_text() == "x = 0\ndef foo():\n    return 2\ny = 2\n"
+
+    def test_fuzzy_replace_preserves_surrounding_content(self, tmp_path):
+        fm = FileManager(str(tmp_path))
+        content = "a = 1\n\n\tb  =  2\n\nc = 3\n"
+
+        result = fm._fuzzy_replace(content, "b = 2\n\nc = 3", "b = 4")
+
+        assert result == "a = 1\n\n\tb = 4\n"
+
+    def test_fuzzy_replace_no_match(self, tmp_path):
+        fm = FileManager(str(tmp_path))
+
+        assert fm._fuzzy_replace("a = 1\n", "b = 2", "b = 3") is None
+
+    def test_apply_edits_batches_per_file(self, tmp_path):
+        (tmp_path / "a.py").write_text("x = 1\ny = 2\n")
+        (tmp_path / "b.py").write_text("z = 3\n")
+
+        fm = FileManager(str(tmp_path))
+        results = fm.apply_edits(
+            [
+                ("a.py", "x = 1", "x = 10"),
+                ("b.py", "missing", "nope"),
+                ("a.py", "y = 2", "y = 20"),
+            ]
+        )
+
+        assert results == [True, False, True]
+        assert (tmp_path / "a.py").read_text() == "x = 10\ny = 20\n"
+        assert (tmp_path / "b.py").read_text() == "z = 3\n"
+
+    def test_apply_edits_keeps_order_within_each_file(self, tmp_path):
+        names = [f"m{i}.py" for i in range(12)]
+        for name in names:
+            (tmp_path / name).write_text("v = 0\n")
+
+        fm = FileManager(str(tmp_path))
+        edits = [(name, "v = 0", "v = 1") for name in names]
+        edits += [(name, "v = 1", "v = 2") for name in names]
+
+        assert fm.apply_edits(edits) == [True] * len(edits)
+        assert all((tmp_path / name).read_text() == "v = 2\n" for name in names)
+
+    @pytest.mark.parametrize(
+        "edits, expected",
+        [
+            ([("a = 1", "a = 10"), ("c = 3", "c = 30")], "a = 10\nb = 2\nc = 30\n"),
+            # Chained: the second search only exists after the first edit.
+            ([("a = 1", "a = 9"), ("a = 9", "a = 99")], "a = 99\nb = 2\nc = 3\n"),
+            # The second search also matches inside the first replacement.
+            ([("= ", "=  "), ("= ", "=  ")], "a =   1\nb = 2\nc = 3\n"),
+        ],
+    )
+    def test_apply_edits_matches_sequential_application(self, tmp_path, edits, expected):
+        (tmp_path / "a.py").write_text("a = 1\nb = 2\nc = 3\n")
+        fm = FileManager(str(tmp_path))
+
+        assert fm.apply_edits([("a.py", s, r) for s, r in edits]) == [True, True]
+        assert (tmp_path / "a.py").read_text() == expected
+
+    def test_apply_edits_missing_file(self, tmp_path):
+        fm = FileManager(str(tmp_path))
+
+        assert fm.apply_edits([("missing.py", "a", "b")]) == [False]
+
+    def test_apply_edit_approximate_match(self, tmp_path):
+        pytest.importorskip("rapidfuzz")
+        test_file = tmp_path / "test.py"
+        test_file.write_text(
+            "def foo():\n    total = compute_total(items, discount=0.1)\n    return total\n"
+        )
+
+        fm = FileManager(str(tmp_path))
+        result = fm.apply_edit(
+            "test.py",
+            "    total = compute_total(items, discount=0.10)\n    return total",
+            "    return compute_total(items)",
+        )
+
+        assert result is True
+        assert test_file.read_text() == "def foo():\n    return compute_total(items)\n"
+
+    def test_read_file_max_bytes_reads_only_the_head(self, tmp_path):
+        (tmp_path / "big.log").write_text("x" * 100 + "@" * 100)
+        fm = FileManager(str(tmp_path))
+
+        head = fm.read_file("big.log", max_bytes=100)
+
+        assert head.startswith("x" * 100 + "\n...[truncated: big.log is 200 bytes")
+        assert "@" not in head
+        assert fm.read_file("big.log") == "x" * 100 + "@" * 100
+        assert fm.read_file("big.log", max_bytes=100) == head
+
+    def test_read_file_empty(self, tmp_path):
+        (tmp_path / "empty.txt").write_text("")
+
+        assert FileManager(str(tmp_path)).read_file("empty.txt") == ""
+
+    def test_concurrent_reads_share_the_cache(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("anvil.files.READ_CACHE_SIZE", 2)
+        names = [f"f{i}.txt" for i in range(20)]
+        for name in names:
+            (tmp_path / name).write_text(name)
+        fm = FileManager(str(tmp_path))
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(fm.read_file, names * 50))
+
+        assert results == names * 50
+        assert len(fm._cache) <= 2
@@ -0,0 +1,155 @@
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from anvil.git import GitRepo
+
+
+def _git(repo, *args):
+    return subprocess.run(
+        ["git", *args], cwd=repo, capture_output=True, text=True, check=True
+    ).stdout
+
+
+def _configure_identity(repo):
+    _git(repo, "config", "user.email", "test@example.com")
+    _git(repo, "config", "user.name", "Test")
+
+
+class TestGitRepo:
+    def test_commit_multiple_files(self, temp_repo):
+        _configure_identity(temp_repo)
+        (temp_repo / "a.py").write_text("a = 1\n")
+        (temp_repo / "b.py").write_text("b = 2\n")
+
+        repo = GitRepo(str(temp_repo))
+        commit_hash, message = repo.commit("add files", ["a.py", "b.py"])
+
+        assert message == "add files"
+        assert commit_hash == _git(temp_repo, "rev-parse", "HEAD").strip()
+        committed = _git(temp_repo, "show", "--name-only", "--format=", "HEAD").split()
+        assert sorted(committed) == ["a.py", "b.py"]
+
+    def test_not_a_git_repo(self, tmp_path):
+        with pytest.raises(Exception, match="Not a git repository"):
+            GitRepo(str(tmp_path))
+
+    def test_repo_validation_is_cached(self, temp_repo, monkeypatch):
+        GitRepo(str(temp_repo))
+
+        def fail(*args, **kwargs):
+            raise AssertionError("git should not be spawned again")
+
+        monkeypatch.setattr(subprocess, "run", fail)
+        GitRepo(str(temp_repo))
+
+    def test_get_diff_max_lines(self, temp_repo):
+        _configure_identity(temp_repo)
+        (temp_repo / "a.txt").write_text("".join(f"{i}\n" for i in range(50)))
+        repo = GitRepo(str(temp_repo))
+        repo.commit("init", ["a.txt"])
+        (temp_repo / "a.txt").write_text("".join(f"{i}!\n" for i in range(50)))
+
+        full = repo.get_diff()
+        head = repo.get_diff(max_lines=5)
+
+        assert full == _git(temp_repo, "diff")
+        assert head == (
+            "".join(full.splitlines(keepends=True)[:5])
+            + "\n[diff truncated after 5 lines]\n"
+        )
+        assert repo.get_diff(max_lines=len(full.splitlines())) == full
+
+    def test_commit_failure_reports_git_error(self, temp_repo):
+        repo = GitRepo(str(temp_repo))
+
+        with pytest.raises(Exception, match="did not match any files"):
+            repo.commit("nothing", ["missing.py"])
+
+    def test_status_and_diff_match_git_cli(self, temp_repo):
+        _configure_identity(temp_repo)
+        for name in ("a", "b", "c"):
+            (temp_repo / name).write_text(f"{name}\n")
+        repo = GitRepo(str(temp_repo))
+        repo.commit("init", ["a", "b", "c"])
+
+        (temp_repo / "a").write_text("a\nchanged\n")
+        (temp_repo / "b").write_text("b\nstaged\n")
+        _git(temp_repo, "add", "b")
+        (temp_repo / "c").unlink()
+        (temp_repo / "untracked").mkdir()
+        (temp_repo / "untracked" / "new.txt").write_text("new\n")
+        (temp_repo / ".gitignore").write_text("*.log\n")
+        (temp_repo / "ignored.log").write_text("log\n")
+
+        assert repo.get_status() == _git(temp_repo, "status", "--short")
+        assert repo.get_diff() == _git(temp_repo, "diff")
+
+    def test_pygit2_backend_matches_subprocess(self, temp_repo):
+        pytest.importorskip("pygit2")
+        (temp_repo / "new.txt").write_text("new\n")
+
+        in_process = GitRepo(str(temp_repo))
+        assert in_process._repo is not None
+        spawned = GitRepo(str(temp_repo))
+        spawned._repo = None
+
+        assert in_process.get_status() == spawned.get_status()
+
+    @pytest.mark.parametrize("in_process", [True, False])
+    def test_reset_soft_keeps_changes_staged(self, temp_repo, in_process):
+        if in_process:
+            pytest.importorskip("pygit2")
+        _configure_identity(temp_repo)
+        (temp_repo / "a.py").write_text("a = 1\n")
+        repo = GitRepo(str(temp_repo))
+        first, _ = repo.commit("first", ["a.py"])
+        (temp_repo / "a.py").write_text("a = 2\n")
+        repo.commit("second", ["a.py"])
+        if not in_process:
+            repo._repo = None
+
+        repo.reset_soft()
+
+        assert _git(temp_repo, "rev-parse", "HEAD").strip() == first
+        assert _git(temp_repo, "status", "--short") == "M  a.py\n"
+
+    @pytest.mark.parametrize("in_process", [True, False])
+    def test_is_dirty_ignores_untracked_by_default(self, temp_repo, in_process):
+        if in_process:
+            pytest.importorskip("pygit2")
+        _configure_identity(temp_repo)
+        (temp_repo / "a.py").write_text("a = 1\n")
+        repo = GitRepo(str(temp_repo))
+        repo.commit("first", ["a.py"])
+        if not in_process:
+            repo._repo = None
+
+        assert not repo.is_dirty()
+        (temp_repo / "new.txt").write_text("new\n")
+        assert not repo.is_dirty()
+        assert repo.is_dirty(include_untracked=True)
+        assert repo.get_status(include_untracked=False) == ""
+
+        (temp_repo / "a.py").write_text("a = 2\n")
+        assert repo.is_dirty()
+        assert repo.get_status(include_untracked=False) == " M a.py\n"
+
+    def test_concurrent_status_and_diff(self, temp_repo):
+        pytest.importorskip("pygit2")
+        _configure_identity(temp_repo)
+        for name in ("a", "b"):
+            (temp_repo / name).write_text(f"{name}\n")
+        repo = GitRepo(str(temp_repo))
+        repo.commit("init", ["a", "b"])
+        (temp_repo / "a").write_text("a\nchanged\n")
+        (temp_repo / "new.txt").write_text("new\n")
+        expected = (repo.get_status(), repo.get_diff())
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(
+                pool.map(lambda _: (repo.get_status(), repo.get_diff()), range(64))
+            )
+
+        assert results == [expected] * 64
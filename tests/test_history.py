@@ -0,0 +1,122 @@
+from anvil.history import MessageHistory
+
+
+class TestMessageHistory:
+    def test_messages_for_api_include_system_prompt(self):
+        history = MessageHistory()
+        history.set_system_prompt("system")
+        history.add_user_message("hello")
+
+        assert history.get_messages_for_api() == [
+            {"role": "system", "content": "system"},
+            {"role": "user", "content": "hello"},
+        ]
+
+    def test_messages_for_api_tracks_appends(self):
+        history = MessageHistory()
+        history.set_system_prompt("system")
+        first = history.get_messages_for_api()
+
+        history.add_user_message("hello")
+        history.messages.append({"role": "assistant", "content": "hi"})
+
+        second = history.get_messages_for_api()
+        assert second is first
+        assert [m["content"] for m in second] == ["system", "hello", "hi"]
+
+    def test_messages_for_api_rebuilds_after_replace(self):
+        history = MessageHistory()
+        history.set_system_prompt("system")
+        history.add_user_message("hello")
+        history.get_messages_for_api()
+
+        history.clear()
+        history.messages = [{"role": "user", "content": "loaded"}]
+        history.set_system_prompt("other")
+
+        assert history.get_messages_for_api() == [
+            {"role": "system", "content": "other"},
+            {"role": "user", "content": "loaded"},
+        ]
+
+    def test_system_reminder_does_not_leak(self):
+        history = MessageHistory()
+        history.add_user_message("hello")
+
+        with_reminder = history.get_messages_for_api(system_reminder="note")
+
+        assert with_reminder[-1] == {"role": "system", "content": "note"}
+        assert history.get_messages_for_api() == [{"role": "user", "content": "hello"}]
+
+    def test_context_messages_stay_after_system_prompt(self):
+        history = MessageHistory()
+        history.set_system_prompt("system")
+        history.add_user_message("question")
+        history.get_messages_for_api()
+
+        history.add_context_message("=== a.py ===")
+        history.add_context_message("=== b.py ===")
+
+        assert history.context_message_count == 2
+        assert [m["content"] for m in history.get_messages_for_api()] == [
+            "system",
+            "=== a.py ===",
+            "=== b.py ===",
+            "question",
+        ]
+
+    def test_context_count_resets_when_messages_replaced(self):
+        history = MessageHistory()
+        history.add_context_message("=== a.py ===")
+
+        history.clear()
+
+        assert history.context_message_count == 0
+
+    def test_keyed_context_message_is_replaced_in_place(self):
+        history = MessageHistory()
+        history.add_context_message("=== a.py ===\nold", key="a.py")
+        history.add_context_message("=== b.py ===", key="b.py")
+        history.add_user_message("question")
+
+        history.add_context_message("=== a.py ===\nnew", key="a.py")
+
+        assert history.context_message_count == 2
+        assert [m["content"] for m in history.get_messages_for_api()] == [
+            "=== a.py ===\nnew",
+            "=== b.py ===",
+            "question",
+        ]
+
+    def test_remove_context_message(self):
+        history = MessageHistory()
+        history.add_context_message("=== a.py ===", key="a.py")
+        history.add_context_message("=== b.py ===", key="b.py")
+
+        assert history.remove_context_message("a.py") is True
+        assert history.remove_context_message("a.py") is False
+        assert history.context_message_count == 1
+        assert history.get_messages_for_api() == [{"role": "user", "content": "=== b.py ==="}]
+
+    def test_drop_oldest_turns_keeps_context_and_recent_turns(self):
+        history = MessageHistory()
+        history.add_context_message("c" * 40, key="a.py")
+        for turn in range(4):
+            history.add_user_message(f"question {turn} " + "x" * 400)
+            history.add_assistant_message(tool_calls=[{"id": str(turn)}])
+            history.add_tool_result(str(turn), "read_file", "y" * 400)
+        history.get_messages_for_api()
+
+        dropped = history.drop_oldest_turns(budget_tokens=450, keep_turns=2)
+
+        assert dropped == 6
+        assert history.messages[0]["content"] == "c" * 40
+        assert history.messages[1]["content"].startswith("question 2")
+        assert history.get_messages_for_api() == history.messages
+
+    def test_drop_oldest_turns_noop_under_budget(self):
+        history = MessageHistory()
+        history.add_user_message("hello")
+
+        assert history.drop_oldest_turns(budget_tokens=100) == 0
+        assert len(history.messages) == 1
@@ -0,0 +1,36 @@
+from common import jsonio
+
+
+class TestJsonio:
+    def test_dumps_loads_roundtrip(self):
+        data = {"success": True, "result": {"path": "a.py", "lines": [1, 2]}, "text": "héllo"}
+
+        assert jsonio.loads(jsonio.dumps(data)) == data
+
+    def test_dumps_falls_back_for_non_str_keys(self):
+        assert jsonio.loads(jsonio.dumps({1: "one"})) == {"1": "one"}
+
+    def test_loads_accepts_bytes(self):
+        assert jsonio.loads(b'{"a": 1}') == {"a": 1}
+
+    def test_atomic_write_json_roundtrip(self, tmp_path):
+        path = tmp_path / "session.json"
+        data = {"b": [1, {"z": None}], "a": "héllo"}
+
+        jsonio.atomic_write_json(path, data)
+
+        assert jsonio.load_json(path) == data
+        assert path.read_text(encoding="utf-8").startswith('{\n  "a": "h')
+
+    def test_load_json_invalid_returns_none(self, tmp_path):
+        path = tmp_path / "broken.json"
+        path.write_text("{not json")
+
+        assert jsonio.load_json(path) is None
+
+    def test_atomic_write_json_compact(self, tmp_path):
+        path = tmp_path / "session.json"
+
+        jsonio.atomic_write_json(path, {"b": [1, 2], "a": "x"}, indent=False)
+
+        assert path.read_text(encoding="utf-8") == '{"a":"x","b":[1,2]}'
@@ -1,3 +1,5 @@
+import subprocess
+
 import pytest
 from anvil.linter import Linter, LintResult
 
@@ -38,3 +40,28 @@ class TestLinter:
         result = LintResult(text="error message", lines=[1, 2, 3])
         assert result.text == "error message"
         assert result.lines == [1, 2, 3]
+
+    def test_lint_many_runs_flake8_once(self, tmp_path, monkeypatch):
+        for name in ("a.py", "b.py", "c.py"):
+            (tmp_path / name).write_text("x = undefined_var\n")
+        calls = []
+
+        def fake_run(cmd, **kwargs):
+            calls.append(cmd)
+            out = (
+                "a.py:1:5: F821 undefined name 'undefined_var'\n"
+                "x = undefined_var\n"
+                "    ^\n"
+                "c.py:1:5: F821 undefined name 'undefined_var'\n"
+            )
+            return subprocess.CompletedProcess(cmd, 1, stdout=out, stderr="")
+
+        monkeypatch.setattr(subprocess, "run", fake_run)
+        results = Linter(str(tmp_path)).lint_many(["a.py", "b.py", "c.py", "notes.txt"])
+
+        assert len(calls) == 1
+        assert calls[0][-3:] == ["a.py", "b.py", "c.py"]
+        assert sorted(results) == ["a.py", "c.py"]
+        assert results["a.py"].text.endswith("    ^\n")
+        assert results["a.py"].lines == [0]
+        assert "c.py" not in results["a.py"].text
@@ -0,0 +1,92 @@
+import asyncio
+import os
+import subprocess
+from pathlib import Path
+from types import SimpleNamespace
+
+import main
+from main import FileManager
+
+
+class TestReadCache:
+    def test_write_refreshes_cache_within_one_mtime_tick(self, tmp_path):
+        path = tmp_path / "a.txt"
+        path.write_text("aaa")
+        st = path.stat()
+        fm = FileManager(str(tmp_path))
+
+        assert fm.read_file("a.txt") == "aaa"
+        fm.write_file("a.txt", "bbb")
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+        assert fm.read_file("a.txt") == "bbb"
+
+    def test_clear_context_file_cache(self, tmp_path):
+        path = tmp_path / "a.txt"
+        path.write_text("aaa")
+        st = path.stat()
+        fm = FileManager(str(tmp_path))
+        fm.read_file("a.txt")
+
+        path.write_text("bbb")
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+        main.clear_context_file_cache()
+
+        assert fm.read_file("a.txt") == "bbb"
+
+
+class TestListFiles:
+    def test_double_star_matches_direct_and_nested_children(self, tmp_path):
+        for rel in ("src/y.js", "src/a/b/x.js", "lib/src/a/x.js", "src/a/x.py"):
+            path = tmp_path / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.touch()
+
+        files = FileManager(str(tmp_path)).list_files("src/**/*.js")
+
+        assert files == ["lib/src/a/x.js", "src/a/b/x.js", "src/y.js"]
+        assert files == sorted(
+            str(p.relative_to(tmp_path)) for p in Path(tmp_path).rglob("src/**/*.js")
+        )
+
+    def test_plain_pattern_matches_names_at_any_depth(self, tmp_path):
+        (tmp_path / "a").mkdir()
+        (tmp_path / "a" / "x.py").touch()
+        (tmp_path / "y.py").touch()
+        (tmp_path / "z.txt").touch()
+
+        assert FileManager(str(tmp_path)).list_files("*.py") == ["a/x.py", "y.py"]
+
+
+class TestStreaming:
+    def test_request_slot_held_until_stream_is_drained(self, tmp_path, monkeypatch):
+        in_flight = []
+        peak = []
+
+        async def stream():
+            in_flight.append(1)
+            peak.append(len(in_flight))
+            for text in ("a", "b"):
+                await asyncio.sleep(0.01)
+                yield SimpleNamespace(
+                    choices=[SimpleNamespace(delta=SimpleNamespace(content=text, tool_calls=None))]
+                )
+            in_flight.pop()
+
+        async def create(**kwargs):
+            return stream()
+
+        client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        monkeypatch.setattr(main, "shared_openai_client", lambda: client)
+        subprocess.run(["git", "init", "-q"], cwd=tmp_path, check=True)
+        agent = main.CodingAgentWithTools(str(tmp_path), main.AgentConfig(max_concurrency=1))
+
+        async def run_two():
+            return await asyncio.gather(
+                agent._handle_streaming_with_tools({}), agent._handle_streaming_with_tools({})
+            )
+
+        responses = asyncio.run(run_two())
+
+        assert [r.content for r in responses] == ["ab", "ab"]
+        assert max(peak) == 1
@@ -0,0 +1,33 @@
+from anvil.outline import python_outline
+
+
+SOURCE = '''\
+LIMIT = 10
+
+
+@decorator
+class Foo(Base, metaclass=Meta):
+    def bar(self, x: int = 1) -> str:
+        return str(x)
+
+    async def baz(self, *args, **kwargs):
+        pass
+
+
+def helper(a, b):
+    return a + b
+'''
+
+
+class TestPythonOutline:
+    def test_outline_lists_signatures_with_line_ranges(self):
+        assert python_outline(SOURCE).splitlines() == [
+            "LIMIT = ...  # L1",
+            "class Foo(Base, metaclass=Meta):  # L4-10",
+            "    def bar(self, x: int=1) -> str: ...  # L6-7",
+            "    async def baz(self, *args, **kwargs): ...  # L9-10",
+            "def helper(a, b): ...  # L13-14",
+        ]
+
+    def test_invalid_source_returns_none(self):
+        assert python_outline("def broken(:\n") is None
@@ -0,0 +1,38 @@
+import io
+
+from anvil.runtime import output
+from anvil.runtime.output import StreamWriter
+
+
+class CountingStream(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.flushes = 0
+
+    def flush(self):
+        self.flushes += 1
+        super().flush()
+
+
+class TestStreamWriter:
+    def test_small_deltas_are_flushed_in_batches(self, monkeypatch):
+        monkeypatch.setattr(output.time, "monotonic", lambda: 0.0)
+        stream = CountingStream()
+        writer = StreamWriter(stream)
+
+        for _ in range(40):
+            writer.write("ab")
+
+        assert stream.getvalue() == "ab" * 40
+        assert stream.flushes == 1
+
+    def test_newline_and_explicit_flush(self, monkeypatch):
+        monkeypatch.setattr(output.time, "monotonic", lambda: 0.0)
+        stream = CountingStream()
+        writer = StreamWriter(stream)
+
+        writer.write("line\n")
+        writer.write("tail")
+        assert stream.flushes == 1
+        writer.flush()
+        assert stream.flushes == 2
@@ -30,3 +30,39 @@ def foo():
         edits = ResponseParser.parse_edits(response)
         
         assert len(edits) == 0
+
+    def test_parse_multiple_edits(self):
+        response = """
+a.py
+```python
+<<<<<<< SEARCH
+x = 1
+=======
+x = 2
+>>>>>>> REPLACE
+```
+
+src/b.js
+```
+<<<<<<< SEARCH
+foo()
+=======
+bar()
+>>>>>>> REPLACE
+```
+"""
+        edits = ResponseParser.parse_edits(response)
+
+        assert edits == [("a.py", "x = 1", "x = 2"), ("src/b.js", "foo()", "bar()")]
+
+    def test_parse_skips_block_without_filename(self):
+        response = """
+```python
+<<<<<<< SEARCH
+x = 1
+=======
+x = 2
+>>>>>>> REPLACE
+```
+"""
+        assert ResponseParser.parse_edits(response) == []
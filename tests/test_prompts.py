@@ -0,0 +1,25 @@
+import os
+
+from anvil.prompts import load_prompt_blocks
+
+
+class TestPromptBlocks:
+    def test_block_reads_are_shared_until_the_file_changes(self, tmp_path):
+        tools = tmp_path / "tools"
+        tools.mkdir()
+        block = tools / "grep.md"
+        block.write_text("search files")
+
+        first = load_prompt_blocks([tmp_path])["get_tool_description"]("grep")
+        second = load_prompt_blocks([tmp_path])["get_tool_description"]("grep")
+        assert first == "search files"
+        assert second is first
+
+        block.write_text("search files by regex")
+        os.utime(block, ns=(0, 1))
+        assert load_prompt_blocks([tmp_path])["get_tool_description"]("grep") == (
+            "search files by regex"
+        )
+
+    def test_missing_block_is_empty(self, tmp_path):
+        assert load_prompt_blocks([tmp_path])["main"] == ""
@@ -0,0 +1,100 @@
+import sqlite3
+from types import SimpleNamespace
+
+from common import agent_loop
+from common.agent_loop import LoopConfig, run_loop
+from common.response_cache import ResponseCache, cache_key
+
+
+def _completion(content):
+    message = SimpleNamespace(content=content, tool_calls=None)
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+class TestResponseCache:
+    def test_round_trip_persists(self, tmp_path):
+        path = tmp_path / "cache" / "responses.sqlite"
+        cache = ResponseCache(path)
+        key = cache_key("gpt-4o", [{"role": "user", "content": "hi"}], 0.0)
+
+        assert cache.get(key) is None
+        cache.set(key, "hello")
+        cache.close()
+
+        assert ResponseCache(path).get(key) == "hello"
+
+    def test_expired_entries_are_not_replayed(self, tmp_path, monkeypatch):
+        path = tmp_path / "responses.sqlite"
+        cache = ResponseCache(path, ttl=60)
+        cache.set("k", "hello")
+
+        monkeypatch.setattr("common.response_cache.time.time", lambda: 10**12)
+        assert cache.get("k") is None
+        cache.close()
+
+        reopened = ResponseCache(path, ttl=60)
+        assert reopened._conn.execute("SELECT COUNT(*) FROM responses").fetchone() == (0,)
+
+    def test_upgrades_cache_without_timestamps(self, tmp_path):
+        path = tmp_path / "responses.sqlite"
+        conn = sqlite3.connect(str(path))
+        conn.execute("CREATE TABLE responses (key TEXT PRIMARY KEY, content TEXT NOT NULL)")
+        conn.execute("INSERT INTO responses VALUES ('old', 'stale')")
+        conn.commit()
+        conn.close()
+
+        assert ResponseCache(path).get("old") == "stale"
+        assert ResponseCache(path, ttl=60).get("old") is None
+
+    def test_key_depends_on_model_and_messages(self):
+        messages = [{"role": "user", "content": "hi"}]
+
+        assert cache_key("a", messages, 0.0) != cache_key("b", messages, 0.0)
+        assert cache_key("a", messages, 0.0) != cache_key("a", [], 0.0)
+
+    def test_run_loop_replays_tool_free_turns(self, tmp_path, monkeypatch):
+        calls = []
+
+        def completion(**kwargs):
+            calls.append(kwargs)
+            return _completion("answer")
+
+        monkeypatch.setattr(agent_loop.llm, "completion", completion)
+        cache = ResponseCache(tmp_path / "responses.sqlite")
+        config = LoopConfig(model="gpt-4o", stream=False, use_tools=False)
+
+        results = [
+            run_loop(
+                messages=[{"role": "user", "content": "question"}],
+                tools=[],
+                execute_tool=lambda name, args: {},
+                config=config,
+                response_cache=cache,
+            )
+            for _ in range(2)
+        ]
+
+        assert [r.final_response for r in results] == ["answer", "answer"]
+        assert len(calls) == 1
+
+    def test_run_loop_skips_cache_with_tools(self, tmp_path, monkeypatch):
+        calls = []
+
+        def completion(**kwargs):
+            calls.append(kwargs)
+            return _completion("answer")
+
+        monkeypatch.setattr(agent_loop.llm, "completion", completion)
+        cache = ResponseCache(tmp_path / "responses.sqlite")
+        tools = [{"type": "function", "function": {"name": "read_file"}}]
+
+        for _ in range(2):
+            run_loop(
+                messages=[{"role": "user", "content": "question"}],
+                tools=tools,
+                execute_tool=lambda name, args: {},
+                config=LoopConfig(model="gpt-4o", stream=False),
+                response_cache=cache,
+            )
+
+        assert len(calls) == 2
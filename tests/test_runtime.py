@@ -0,0 +1,125 @@
+import os
+
+import litellm
+
+from anvil.runtime import runtime as runtime_module
+from anvil.runtime.runtime import AnvilRuntime
+from common import llm
+
+
+def _context(runtime):
+    return [m["content"] for m in runtime.history.messages[: runtime.history.context_message_count]]
+
+
+class TestFileContext:
+    def test_unchanged_file_is_not_read_again(self, tmp_path, monkeypatch):
+        (tmp_path / "a.py").write_text("a = 1\n")
+        runtime = AnvilRuntime(str(tmp_path))
+        runtime.add_file_to_context("a.py")
+
+        def fail(filepath):
+            raise AssertionError("unchanged file should not be re-read")
+
+        monkeypatch.setattr(runtime.files, "read_file", fail)
+        runtime.add_file_to_context("a.py")
+
+        assert _context(runtime) == ["=== a.py ===\na = 1\n\n"]
+
+    def test_changed_file_replaces_its_snapshot(self, tmp_path):
+        path = tmp_path / "a.py"
+        path.write_text("a = 1\n")
+        runtime = AnvilRuntime(str(tmp_path))
+        runtime.add_file_to_context("a.py")
+
+        path.write_text("a = 22\n")
+        st = path.stat()
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+        runtime.add_file_to_context("a.py")
+
+        assert _context(runtime) == ["=== a.py ===\na = 22\n\n"]
+        assert list(runtime.files_in_context) == ["a.py"]
+
+
+class TestRateLimitRetry:
+    def test_retries_with_backoff_then_gives_up(self, tmp_path, monkeypatch):
+        runtime = AnvilRuntime(str(tmp_path))
+        runtime.config.max_retries = 2
+        calls, delays = [], []
+
+        def run_loop(**kwargs):
+            calls.append(kwargs)
+            raise litellm.RateLimitError("slow down", llm_provider="openai", model="gpt-4o")
+
+        monkeypatch.setattr(runtime_module, "run_loop", run_loop)
+        monkeypatch.setattr("common.llm.note_rate_limit", delays.append)
+        runtime.process_user_message("hi")
+
+        assert len(calls) == 3
+        assert 1 <= delays[0] < 2 and 2 <= delays[1] < 3
+
+    def test_retry_after_header_sets_the_delay(self, tmp_path, monkeypatch):
+        runtime = AnvilRuntime(str(tmp_path))
+        runtime.config.max_retries = 1
+        delays = []
+
+        def run_loop(**kwargs):
+            raise litellm.RateLimitError(
+                "slow down",
+                llm_provider="openai",
+                model="gpt-4o",
+                headers={"retry-after-ms": "250"},
+            )
+
+        monkeypatch.setattr(runtime_module, "run_loop", run_loop)
+        monkeypatch.setattr("common.llm.note_rate_limit", delays.append)
+        runtime.process_user_message("hi")
+
+        assert delays == [0.25]
+
+    def test_cooldown_is_shared_by_later_calls(self, monkeypatch):
+        sleeps = []
+        monkeypatch.setattr("common.llm._cooldown_until", 0.0)
+        monkeypatch.setattr("common.llm.time.sleep", sleeps.append)
+
+        llm.wait_for_rate_limit()
+        llm.note_rate_limit(5.0)
+        llm.wait_for_rate_limit()
+
+        assert len(sleeps) == 1 and 4 < sleeps[0] <= 5
+
+    def test_other_errors_are_not_retried(self, tmp_path, monkeypatch):
+        runtime = AnvilRuntime(str(tmp_path))
+        calls = []
+
+        def run_loop(**kwargs):
+            calls.append(kwargs)
+            raise ValueError("rate limit exceeded in the parser")
+
+        monkeypatch.setattr(runtime_module, "run_loop", run_loop)
+        runtime.process_user_message("hi")
+
+        assert len(calls) == 1
+
+
+class TestGitToolCache:
+    def test_status_is_reused_until_a_write(self, temp_repo, monkeypatch):
+        from anvil.modes.registry import get_mode
+
+        runtime = AnvilRuntime(str(temp_repo), mode=get_mode("coding"))
+        git = runtime.extensions["coding"].git
+        calls = []
+        monkeypatch.setattr(
+            git,
+            "get_status",
+            lambda include_untracked=True: calls.append(include_untracked) or "?? a.py\n",
+        )
+
+        first = runtime.tools.execute_tool("git_status", {})
+        runtime.tools.execute_tool("git_status", {})
+        runtime.files.write_file("a.py", "a = 1\n")
+        runtime.tools.execute_tool("git_status", {})
+
+        runtime.tools.execute_tool("git_status", {"include_untracked": False})
+
+        assert first == {"success": True, "result": "?? a.py\n"}
+        assert calls == [True, True, False]
@@ -0,0 +1,153 @@
+import selectors
+import time
+
+import pytest
+
+from anvil.shell import (
+    ShellRunner,
+    is_destructive_command,
+    is_safe_command,
+    timeout_for,
+)
+
+
+class TestCommandPolicy:
+    @pytest.mark.parametrize(
+        "command", ["ls", "ls -la", "git status", "git diff src/a.py", "cat src/a.py"]
+    )
+    def test_safe_commands(self, command):
+        assert is_safe_command(command)
+
+    @pytest.mark.parametrize(
+        "command",
+        [
+            "lsblk",
+            "ls; rm -rf /",
+            "cat x > y",
+            "echo $(whoami)",
+            "make",
+            "pytest -q",
+            "python -m pytest",
+            "cat /etc/passwd",
+            "cat ~/.ssh/id_rsa",
+            "head ../secrets.txt",
+            "git diff --output=x",
+            "git log -o x",
+            "git show --ext-diff HEAD",
+            "git diff --textconv",
+        ],
+    )
+    def test_unsafe_commands(self, command):
+        assert not is_safe_command(command)
+
+    def test_destructive_commands(self):
+        assert is_destructive_command("rm -rf build")
+        assert is_destructive_command("make clean && sudo make install")
+        assert not is_destructive_command("git rm-cache-helper")
+
+    @pytest.mark.parametrize("command", ["/bin/rm -rf x", "command rm x", "/usr/bin/sudo ls"])
+    def test_destructive_commands_by_path(self, command):
+        assert is_destructive_command(command)
+
+
+class TestShellRunner:
+    def test_safe_command_skips_prompt(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("builtins.input", pytest.fail)
+        runner = ShellRunner(str(tmp_path))
+
+        result = runner.run_command("pwd")
+
+        assert result["success"]
+        assert result["stdout"].strip() == str(tmp_path)
+
+    def test_approval_is_remembered(self, tmp_path, monkeypatch):
+        prompts = []
+        monkeypatch.setattr("builtins.input", lambda msg: prompts.append(msg) or "y")
+        runner = ShellRunner(str(tmp_path))
+
+        runner.run_command("echo hi")
+        result = runner.run_command("echo hi")
+
+        assert result["stdout"] == "hi\n"
+        assert len(prompts) == 1
+
+    def test_destructive_command_always_prompts(self, tmp_path, monkeypatch):
+        prompts = []
+        monkeypatch.setattr("builtins.input", lambda msg: prompts.append(msg) or "y")
+        runner = ShellRunner(str(tmp_path))
+
+        runner.run_command("rm -f missing.txt")
+        runner.run_command("rm -f missing.txt")
+
+        assert len(prompts) == 2
+
+    def test_declined_command(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("builtins.input", lambda msg: "n")
+        runner = ShellRunner(str(tmp_path))
+
+        result = runner.run_command("echo hi")
+
+        assert result["error"] == "User cancelled"
+
+    def test_timeout_kills_process_group(self, tmp_path):
+        runner = ShellRunner(str(tmp_path), auto_approve=True)
+
+        started = time.monotonic()
+        result = runner.run_command("sleep 10 & sleep 10", timeout=1)
+
+        assert result["error"] == "Command timed out"
+        assert time.monotonic() - started < 5
+
+    def test_timeout_for_uses_longest_prefix(self):
+        assert timeout_for("pytest -q") == 300
+        assert timeout_for("python -m pytest tests") == 300
+        assert timeout_for("ls -la") == 10
+        assert timeout_for("echo hi") == 30
+
+    def test_persistent_shell_isolates_commands(self, tmp_path):
+        runner = ShellRunner(str(tmp_path), auto_approve=True)
+        (tmp_path / "sub").mkdir()
+
+        first = runner.run_command("cd sub && export FOO=1 && printf partial")
+        failed = runner.run_command("echo oops >&2; exit 3")
+        after = runner.run_command('pwd; echo "[$FOO]"')
+
+        assert first["stdout"] == "partial"
+        assert failed == {"success": False, "stdout": "", "stderr": "oops\n", "exit_code": 3}
+        assert after["stdout"] == f"{tmp_path}\n[]\n"
+        runner.close()
+
+    def test_shell_restarts_after_timeout(self, tmp_path):
+        runner = ShellRunner(str(tmp_path), auto_approve=True)
+
+        runner.run_command("sleep 10", timeout=1)
+        result = runner.run_command("echo back")
+
+        assert result["stdout"] == "back\n"
+        runner.close()
+
+    def test_interrupt_kills_abandoned_command(self, tmp_path, monkeypatch):
+        runner = ShellRunner(str(tmp_path), auto_approve=True)
+        original_select = selectors.DefaultSelector.select
+
+        def interrupt(selector, timeout=None):
+            monkeypatch.setattr(selectors.DefaultSelector, "select", original_select)
+            raise KeyboardInterrupt
+
+        monkeypatch.setattr(selectors.DefaultSelector, "select", interrupt)
+        with pytest.raises(KeyboardInterrupt):
+            runner.run_command("sleep 0.5; echo FIRST; touch marker")
+        result = runner.run_command("echo SECOND")
+        time.sleep(1)
+
+        assert result["stdout"] == "SECOND\n"
+        assert not (tmp_path / "marker").exists()
+        runner.close()
+
+    def test_one_off_process_without_persistent_shell(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("anvil.shell.PERSISTENT_SHELL", False)
+        runner = ShellRunner(str(tmp_path), auto_approve=True)
+
+        result = runner.run_command("echo hi; exit 2")
+
+        assert result == {"success": False, "stdout": "hi\n", "stderr": "", "exit_code": 2}
@@ -1,3 +1,5 @@
+import threading
+
 from anvil.tools import ToolRegistry
 
 
@@ -48,3 +50,69 @@ class TestToolRegistry:
         result = registry.execute_tool("unknown", {})
         
         assert "error" in result
+
+    def test_tool_schemas_cached_until_register(self):
+        registry = ToolRegistry()
+        registry.register_tool(
+            name="one",
+            description="First",
+            parameters={"type": "object", "properties": {}},
+            implementation=lambda: 1,
+        )
+
+        first = registry.get_tool_schemas()
+        assert registry.get_tool_schemas() is first
+
+        registry.register_tool(
+            name="two",
+            description="Second",
+            parameters={"type": "object", "properties": {}},
+            implementation=lambda: 2,
+        )
+
+        names = [schema["function"]["name"] for schema in registry.get_tool_schemas()]
+        assert names == ["one", "two"]
+
+    def test_execute_tools_runs_safe_batch_concurrently(self):
+        registry = ToolRegistry()
+        barrier = threading.Barrier(2, timeout=5)
+
+        def wait(value: int) -> int:
+            barrier.wait()
+            return value
+
+        registry.register_tool(
+            name="wait",
+            description="Wait for a peer",
+            parameters={"type": "object", "properties": {}},
+            implementation=wait,
+            parallel_safe=True,
+        )
+
+        results = registry.execute_tools([("wait", {"value": 1}), ("wait", {"value": 2})])
+
+        assert [r["result"] for r in results] == [1, 2]
+
+    def test_execute_tools_sequential_with_unsafe_tool(self):
+        registry = ToolRegistry()
+        order = []
+
+        registry.register_tool(
+            name="read",
+            description="Read",
+            parameters={"type": "object", "properties": {}},
+            implementation=lambda: order.append("read"),
+            parallel_safe=True,
+        )
+        registry.register_tool(
+            name="write",
+            description="Write",
+            parameters={"type": "object", "properties": {}},
+            implementation=lambda: order.append("write"),
+        )
+
+        results = registry.execute_tools([("write", {}), ("read", {}), ("missing", {})])
+
+        assert order == ["write", "read"]
+        assert results[0]["success"] and results[1]["success"]
+        assert "error" in results[2]